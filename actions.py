@@ -62,7 +62,7 @@ class MovementAction(ActionWithDirection):
 
         if not self.engine.map.in_bounds(dest_x, dest_y):
             raise exceptions.Impossible("That way is blocked.")
-        if not self.engine.map.tiles["walkable"][dest_x, dest_y]:
+        if not self.engine.map.walkable[dest_x, dest_y]:
             raise exceptions.Impossible("That way is blocked.")
         if self.engine.map.get_blocking_entity_at(dest_x, dest_y):
             raise exceptions.Impossible("That way is blocked.")
@@ -131,18 +131,17 @@ class PickupAction(Action):
         actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                if len(inventory.items) >= inventory.capacity:
-                    raise exceptions.Impossible("Your inventory is full.")
-                
-                self.engine.map.entities.remove(item)
-                item.parent = self.entity.inventory
-                inventory.items.append(item)
-
-                self.engine.message_log.add_message(f"You picked up the {item.name}")
-                return
+        for item in self.engine.map.get_items_at(actor_location_x, actor_location_y):
+            if len(inventory.items) >= inventory.capacity:
+                raise exceptions.Impossible("Your inventory is full.")
             
+            self.engine.map.remove_entity(item)
+            item.parent = self.entity.inventory
+            inventory.items.append(item)
+
+            self.engine.message_log.add_message(f"You picked up the {item.name}")
+            return
+        
         raise exceptions.Impossible("There is nothing here to pick up.")
     
 class DropAction(ItemAction):
@@ -154,11 +153,18 @@ class DropAction(ItemAction):
 
 class TakeStairsAction(Action):
     def perform(self):
-        if (self.entity.x, self.entity.y) == self.engine.map.downstairs_location:
-            self.engine.world.generate_floor()
+        location = self.entity.x, self.entity.y
+
+        if location == self.engine.map.downstairs_location:
+            self.engine.world.descend()
             self.engine.message_log.add_message(
                 "You descended the staircase.", color.descend
             )
+        elif location == self.engine.map.upstairs_location:
+            self.engine.world.ascend()
+            self.engine.message_log.add_message(
+                "You ascended the staircase.", color.descend
+            )
         else:
             raise exceptions.Impossible("There are no stairs here.")
         
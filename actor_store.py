@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np #type:ignore
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+#columns of the store and their types
+ACTOR_DT = {
+    "x": np.int32,
+    "y": np.int32,
+    "hp": np.int32,
+    "max_hp": np.int32,
+    "base_power": np.int32,
+    "base_defense": np.int32,
+    "power_bonus": np.int32,
+    "defense_bonus": np.int32,
+    "alive": np.bool_,
+}
+
+class ActorStore:
+    """Struct-of-arrays storage for the positions and combat stats of a map's actors.
+
+    Every attached actor owns a row, each column is a NumPy array indexed by row.
+    Rows of removed actors have `alive` set to False and are reused.
+    While attached, the Fighter stats are views into their columns, see StoredField.
+    Positions are written by the GameMap spatial index.
+    """
+    def __init__(self, capacity:int = 64):
+        self.actors:List[Optional[Actor]] = [None] * capacity
+        self.rows:Dict[Actor, int] = {}
+        self._free:List[int] = list(range(capacity - 1, -1, -1))
+
+        self.x = np.zeros(capacity, dtype=ACTOR_DT["x"])
+        self.y = np.zeros(capacity, dtype=ACTOR_DT["y"])
+        self.hp = np.zeros(capacity, dtype=ACTOR_DT["hp"])
+        self.max_hp = np.zeros(capacity, dtype=ACTOR_DT["max_hp"])
+        self.base_power = np.zeros(capacity, dtype=ACTOR_DT["base_power"])
+        self.base_defense = np.zeros(capacity, dtype=ACTOR_DT["base_defense"])
+        self.power_bonus = np.zeros(capacity, dtype=ACTOR_DT["power_bonus"])
+        self.defense_bonus = np.zeros(capacity, dtype=ACTOR_DT["defense_bonus"])
+        self.alive = np.zeros(capacity, dtype=ACTOR_DT["alive"])
+
+    def __contains__(self, actor:Actor) -> bool:
+        return actor in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def power(self) -> np.ndarray:
+        return self.base_power + self.power_bonus
+
+    @property
+    def defense(self) -> np.ndarray:
+        return self.base_defense + self.defense_bonus
+
+    def _grow(self) -> None:
+        capacity = len(self.actors)
+        for name in ACTOR_DT:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+
+        self.actors.extend([None] * capacity)
+        self._free.extend(range(capacity * 2 - 1, capacity - 1, -1))
+
+    def add(self, actor:Actor) -> None:
+        """Give an actor a row and move its stats into it"""
+        if actor in self.rows:
+            self.move(actor)
+            return
+        if not self._free:
+            self._grow()
+
+        row = self._free.pop()
+        self.rows[actor] = row
+        self.actors[row] = actor
+
+        self.x[row] = actor.x
+        self.y[row] = actor.y
+        self.alive[row] = True
+        actor.fighter.attach(self, row)
+
+    def remove(self, actor:Actor) -> None:
+        """Move an actor's stats back onto its Fighter and free its row"""
+        row = self.rows.pop(actor, None)
+        if row is None:
+            return
+
+        if actor.fighter.store is self:
+            actor.fighter.detach()
+        self.actors[row] = None
+        self.alive[row] = False
+        self._free.append(row)
+
+    def move(self, actor:Actor) -> None:
+        row = self.rows.get(actor)
+        if row is not None:
+            self.x[row] = actor.x
+            self.y[row] = actor.y
+
+class StoredField:
+    """A Fighter attribute that lives in the ActorStore column of the same name while attached.
+
+    While detached, e.g. for prototypes and actors off the map, the value lives in
+    the slot with a leading underscore.
+    """
+    def __set_name__(self, owner:type, name:str) -> None:
+        self.column = name
+        self.slot = f"_{name}"
+
+    def __get__(self, instance:Any, owner:Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+
+        store = getattr(instance, "store", None)
+        if store is None:
+            return getattr(instance, self.slot)
+        return int(getattr(store, self.column)[instance.row])
+
+    def __set__(self, instance:Any, value:int) -> None:
+        store = getattr(instance, "store", None)
+        if store is None:
+            setattr(instance, self.slot, value)
+        else:
+            getattr(store, self.column)[instance.row] = value
@@ -0,0 +1,178 @@
+"""Generate dungeon floors in bulk without a window, for balance testing.
+
+Every seed is a separate game, its floors come out exactly as they would in play.
+Seeds are spread over a process pool and the results are written to a single
+compressed .npz file:
+
+    python batch_procgen.py --seeds 0-999 --floors 1-10 --output floors.npz
+
+The file holds one row per floor in `seeds`, `floors`, `tiles` (tile_types indices),
+`entry` and `downstairs`, and one row per entity in `entity_row` (the floor row),
+`entity_kind` (an index into `kinds`), `entity_x` and `entity_y`.
+
+--enemy-chances and --item-chances take JSON chance tables, see procgen.load_spawn_chances.
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np #type:ignore
+
+import entity_factories
+from engine import Engine
+from game_map import GameWorld
+import procgen
+
+class FloorParameters(NamedTuple):
+    map_width:int = 80
+    map_height:int = 43
+    max_rooms:int = 30
+    room_min_size:int = 6
+    room_max_size:int = 10
+    generator:str = "rooms"
+
+class SeedResult(NamedTuple):
+    seed:int
+    floors:List[int]
+    tiles:np.ndarray
+    entry:np.ndarray
+    downstairs:np.ndarray
+    #one (floor index, name, x, y) tuple per entity
+    entities:List[tuple]
+    timings:Dict[str,float]
+
+def generate_seed(seed:int, floors:Sequence[int], parameters:FloorParameters) -> SeedResult:
+    """Generate the given floors of one game, meant to run in a worker process"""
+    start = time.perf_counter()
+
+    #a headless engine, generation only needs it to tell the player apart
+    engine = Engine(entity_factories.player.clone(), seed=seed)
+    world = GameWorld(engine=engine, **parameters._asdict())
+
+    timings:Dict[str,float] = {}
+    tiles = np.empty((len(floors), parameters.map_width, parameters.map_height), dtype=np.uint8)
+    entry = np.empty((len(floors), 2), dtype=np.int16)
+    downstairs = np.empty((len(floors), 2), dtype=np.int16)
+    entities:List[tuple] = []
+
+    for i, floor_number in enumerate(floors):
+        dungeon = world.build_floor(floor_number, timings)
+
+        tiles[i] = dungeon.tiles
+        entry[i] = dungeon.entry_location
+        downstairs[i] = dungeon.downstairs_location
+        #sorted, the entity set has no stable order between runs
+        entities.extend(sorted((i, entity.name, entity.x, entity.y) for entity in dungeon.entities))
+
+    timings["total"] = time.perf_counter() - start
+    return SeedResult(seed, list(floors), tiles, entry, downstairs, entities, timings)
+
+def write_results(filename:str, results:List[SeedResult], parameters:FloorParameters) -> None:
+    kinds = sorted({name for result in results for _, name, _, _ in result.entities})
+    kind_index = {name: i for i, name in enumerate(kinds)}
+
+    entity_row:List[int] = []
+    entity_kind:List[int] = []
+    entity_x:List[int] = []
+    entity_y:List[int] = []
+
+    row = 0
+    for result in results:
+        for floor, name, x, y in result.entities:
+            entity_row.append(row + floor)
+            entity_kind.append(kind_index[name])
+            entity_x.append(x)
+            entity_y.append(y)
+        row += len(result.floors)
+
+    np.savez_compressed(
+        filename,
+        parameters=json.dumps(parameters._asdict()),
+        seeds=np.array([r.seed for r in results for _ in r.floors], dtype=np.uint64),
+        floors=np.array([f for r in results for f in r.floors], dtype=np.int32),
+        tiles=np.concatenate([r.tiles for r in results]),
+        entry=np.concatenate([r.entry for r in results]),
+        downstairs=np.concatenate([r.downstairs for r in results]),
+        kinds=np.array(kinds),
+        entity_row=np.array(entity_row, dtype=np.int32),
+        entity_kind=np.array(entity_kind, dtype=np.uint16),
+        entity_x=np.array(entity_x, dtype=np.int16),
+        entity_y=np.array(entity_y, dtype=np.int16),
+    )
+
+def use_spawn_chances(enemy_file:Optional[str], item_file:Optional[str]) -> None:
+    """Replace the procgen chance tables with ones loaded from files, run in each worker"""
+    if enemy_file:
+        procgen.enemy_chances = procgen.load_spawn_chances(enemy_file)
+    if item_file:
+        procgen.item_chances = procgen.load_spawn_chances(item_file)
+
+def generate(
+        seeds:Sequence[int],
+        floors:Sequence[int],
+        parameters:FloorParameters,
+        workers:Optional[int] = None,
+        enemy_file:Optional[str] = None,
+        item_file:Optional[str] = None,
+) -> List[SeedResult]:
+    """Generate the floors of every seed across a process pool, in seed order"""
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=use_spawn_chances, initargs=(enemy_file, item_file)
+    ) as executor:
+        futures = [
+            executor.submit(generate_seed, seed, floors, parameters) for seed in seeds
+        ]
+        return [future.result() for future in futures]
+
+def parse_range(text:str) -> List[int]:
+    """Parse "3", "1-10" or "1,4,7-9" into a list of integers"""
+    numbers:List[int] = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        numbers.extend(range(int(first), int(last or first) + 1))
+    return numbers
+
+def main(argv:Optional[Sequence[str]] = None) -> None:
+    defaults = FloorParameters()
+
+    parser = argparse.ArgumentParser(description="Generate dungeon floors in bulk.")
+    parser.add_argument("--seeds", type=parse_range, default=parse_range("0-99"), help="e.g. 0-99")
+    parser.add_argument("--floors", type=parse_range, default=parse_range("1-10"), help="e.g. 1-10")
+    parser.add_argument("--output", default="floors.npz")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--enemy-chances", help="JSON file replacing procgen.enemy_chances")
+    parser.add_argument("--item-chances", help="JSON file replacing procgen.item_chances")
+    for name, value in defaults._asdict().items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args(argv)
+
+    parameters = FloorParameters(**{name: getattr(args, name) for name in FloorParameters._fields})
+
+    start = time.perf_counter()
+    results = generate(
+        args.seeds, args.floors, parameters, args.workers, args.enemy_chances, args.item_chances
+    )
+    generated = time.perf_counter()
+    write_results(args.output, results, parameters)
+    written = time.perf_counter()
+
+    count = sum(len(result.floors) for result in results)
+    print(f"{count} floors in {written - start:.2f}s, {count / (generated - start):.0f} floors/s")
+
+    #stage times are summed over all workers, so they are per floor of worker time
+    stages:Dict[str,float] = {}
+    for result in results:
+        for stage, seconds in result.timings.items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    for stage, seconds in stages.items():
+        print(f"  {stage:<8}{seconds * 1000 / count:>8.3f} ms/floor")
+    print(f"  {'write':<8}{(written - generated) * 1000 / count:>8.3f} ms/floor")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Measure the memory taken by spawned entities and log messages.
+
+Run from the repository root:
+
+    python -m benchmarks.entity_memory
+"""
+import tracemalloc
+from typing import Callable, List
+
+import entity_factories
+from message_log import Message
+
+COUNT = 10000
+
+def bytes_per_object(create:Callable[[], object], count:int = COUNT) -> float:
+    """Return the average number of bytes allocated by `create`, keeping all results alive"""
+    objects:List[object] = []
+
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+
+    for _ in range(count):
+        objects.append(create())
+
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    #the list holding the objects is not part of their cost
+    return (end - start - count * 8) / count
+
+def main() -> None:
+    benchmarks = {
+        "Actor (orc)": entity_factories.orc.clone,
+        "Item (health potion)": entity_factories.health_potion.clone,
+        "Item (sword)": entity_factories.sword.clone,
+        "Message": lambda: Message("The Orc attacks Player for 3 hit points", (255, 255, 255)),
+    }
+
+    for name, create in benchmarks.items():
+        print(f"{name:<24}{bytes_per_object(create):>10.0f} bytes")
+
+if __name__ == "__main__":
+    main()
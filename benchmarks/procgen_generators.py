@@ -0,0 +1,52 @@
+"""Time the map layout generators, on their own and as part of a whole floor.
+
+Run from the repository root:
+
+    python -m benchmarks.procgen_generators
+"""
+import time
+from typing import Callable
+
+import numpy as np #type:ignore
+
+import entity_factories
+from engine import Engine
+from game_map import GameWorld
+from map_generators import GENERATORS
+
+SIZES = ((80, 43), (200, 200), (500, 500))
+REPEATS = 5
+
+def seconds_per_call(call:Callable[[], object], repeats:int = REPEATS) -> float:
+    """Return the best time of `repeats` calls, the least disturbed by the rest of the system"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main() -> None:
+    print(f"{'generator':<10}{'size':>10}{'layout':>12}{'floor':>12}")
+
+    for width, height in SIZES:
+        for name, generator in GENERATORS.items():
+            rng = np.random.default_rng(0)
+            layout = seconds_per_call(lambda: generator(rng, width, height, 30, 6, 10))
+
+            engine = Engine(entity_factories.player.clone(), seed=0)
+            world = GameWorld(
+                engine=engine,
+                map_width=width,
+                map_height=height,
+                max_rooms=30,
+                room_min_size=6,
+                room_max_size=10,
+                generator=name,
+            )
+            floor = seconds_per_call(lambda: world.build_floor(1))
+
+            print(f"{name:<10}{f'{width}x{height}':>10}{layout * 1000:>10.1f}ms{floor * 1000:>10.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
 from __future__ import annotations
-import random
 from typing import TYPE_CHECKING, List, Optional, Tuple
 
-import numpy as np # type:ignore
 import tcod
 
 from actions import Action, MeleeAction, MovementAction, WaitAction, BumpAction
@@ -16,18 +14,18 @@ class BaseAI(Action):
     def perform(self):
         raise NotImplementedError()
     
+    @property
+    def is_idle(self) -> bool:
+        """Return True if this AI has nothing to do until it's woken up"""
+        return False
+
     def get_path_to(self, dest_x, dest_y) -> List[Tuple[int,int]]:
         """Compute and return a path to the target position.
         
         If there is no valid path then returns an empty list.
         """
 
-        cost = np.array(self.entity.map.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.map.entities:
-            #cost of a blocked position
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                cost[entity.x, entity.y] += 10
+        cost = self.entity.map.get_path_cost()
 
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
         pathfinder = tcod.path.Pathfinder(graph)
@@ -42,6 +40,16 @@ class HostileEnemy(BaseAI):
     def __init__(self, entity:Actor):
         super().__init__(entity)
         self.path: List[Tuple[int,int]] = []
+        self.last_seen_target: Optional[Tuple[int,int]] = None
+
+    def __setstate__(self, state:dict) -> None:
+        #saves from before hostiles remembered where they last saw the player
+        state.setdefault("last_seen_target", None)
+        self.__dict__.update(state)
+
+    @property
+    def is_idle(self) -> bool:
+        return not self.path and self.last_seen_target is None
 
     def perform(self):
         target = self.engine.player
@@ -50,11 +58,26 @@ class HostileEnemy(BaseAI):
 
         distance = max(abs(dx), abs(dy)) # Chebyshev distance
 
-        if self.engine.map.visible[self.entity.x, self.entity.y]:
+        if self.engine.map.can_perceive(self.entity):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
             
-            self.path = self.get_path_to(target.x, target.y)
+            #chase using the shared flow field, computed by the engine on turns where some actor perceives the player
+            self.path = []
+            self.last_seen_target = target.x, target.y
+            step = self.engine.map.descend_flow_field(self.entity.x, self.entity.y)
+
+            if step:
+                return MovementAction(
+                    self.entity, step[0] - self.entity.x, step[1] - self.entity.y,
+                ).perform()
+            
+            return WaitAction(self.entity).perform()
+
+        if self.last_seen_target:
+            #lost sight of the target, head for where it was last seen
+            self.path = self.get_path_to(*self.last_seen_target)
+            self.last_seen_target = None
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
@@ -78,7 +101,7 @@ class ConfusedEnemy(BaseAI):
             )
             self.entity.ai = self.previous_ai
         else:
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = self.engine.rng.ai.choice(
                 [
                     (-1,-1),
                     (0,-1),
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import copy
+from typing import TypeVar, TYPE_CHECKING
+
+from slotted import Slotted
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
     from game_map import GameMap
 
-class BaseComponent:
+C = TypeVar("C", bound="BaseComponent")
+
+class BaseComponent(Slotted):
+    __slots__ = ("parent",)
+
     parent:Entity
 
     @property
@@ -16,4 +23,13 @@ class BaseComponent:
 
     @property
     def engine(self) -> Engine:
-        return self.map.engine
\ No newline at end of file
+        return self.map.engine
+
+    def clone(self:C, parent:Entity) -> C:
+        """Return a copy of this component belonging to `parent`.
+
+        Fields are copied shallowly, components holding mutable state override this.
+        """
+        clone = copy.copy(self)
+        clone.parent = parent
+        return clone
\ No newline at end of file
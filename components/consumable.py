@@ -18,6 +18,8 @@ if TYPE_CHECKING:
     from entity import Actor, Item
 
 class Consumable(BaseComponent):
+    __slots__ = ()
+
     parent:Item
 
     def get_action(self, consumer:Actor) -> Optional[ActionOrHandler]:
@@ -33,6 +35,8 @@ class Consumable(BaseComponent):
             inventory.items.remove(entity)
     
 class HealingConsumable(Consumable):
+    __slots__ = ("amount",)
+
     def __init__(self, amount:int):
         self.amount = amount
 
@@ -50,22 +54,19 @@ class HealingConsumable(Consumable):
             raise Impossible("Your health is already full.")
         
 class LightningDamageConsumable(Consumable):
+    __slots__ = ("damage", "max_range")
+
     def __init__(self, damage:int, max_range:int):
         self.damage = damage
         self.max_range = max_range
 
     def activate(self, action:actions.ItemAction) -> None:
         consumer = action.entity
-        target = None
-        closest_distance = self.max_range + 1.0
-
-        for actor in self.engine.map.actors:
-            if actor is not consumer and self.parent.map.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        #reaches anything closer than max_range + 1, diagonal neighbours of the edge included
+        target = self.engine.map.nearest_actor(
+            consumer.x, consumer.y, self.max_range + 1, visible_only=True, exclude=consumer,
+            inclusive=False,
+        )
 
         if target:
             self.engine.message_log.add_message(
@@ -78,6 +79,8 @@ class LightningDamageConsumable(Consumable):
             raise Impossible("No enemy is close enough to strike.")
         
 class ConfusionConsumable(Consumable):
+    __slots__ = ("number_of_turns",)
+
     def __init__(self, number_of_turns:int):
         self.number_of_turns = number_of_turns
 
@@ -113,6 +116,8 @@ class ConfusionConsumable(Consumable):
         self.consume()
 
 class FireballDamageConsumable(Consumable):
+    __slots__ = ("damage", "radius")
+
     def __init__(self, damage:int, radius:int):
         self.damage = damage
         self.radius = radius
@@ -136,15 +141,17 @@ class FireballDamageConsumable(Consumable):
         
         targets_hit = False
 
-        for actor in self.engine.map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
-                )
-                actor.fighter.take_damage(self.damage)
-                targets_hit = True
+        for actor in self.engine.map.actors_within(*target_xy, self.radius):
+            self.engine.message_log.add_message(
+                f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
+            )
+            actor.fighter.take_damage(self.damage)
+            targets_hit = True
 
         if not targets_hit:
             raise Impossible("There are no targets in the radius.")
         
+        #the blast can be heard from afar
+        self.engine.map.make_noise(*target_xy, radius=self.radius * 4)
+
         self.consume()
\ No newline at end of file
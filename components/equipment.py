@@ -1,46 +1,110 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple, TYPE_CHECKING
 from components.base_component import BaseComponent
 from equipment_types import EquipmentType
+from slotted import state_to_dict
 
 if TYPE_CHECKING:
     from entity import Actor, Item
 
+DEFAULT_SLOTS = ("weapon", "armor")
+
+def slot_for(equipment_type:EquipmentType) -> str:
+    """Return the name of the slot items of this equipment type go in"""
+    return equipment_type.name.lower()
 
 class Equipment(BaseComponent):
+    __slots__ = ("slots", "modifiers", "_bonuses")
+
     parent:Actor
 
-    def __init__(self, weapon:Optional[Item]=None, armor:Optional[Item]=None):
-        self.weapon = weapon
-        self.armor = armor
+    def __init__(
+            self,
+            weapon:Optional[Item]=None,
+            armor:Optional[Item]=None,
+            slots:Iterable[str]=DEFAULT_SLOTS,
+            ):
+        self.slots:Dict[str, Optional[Item]] = {slot: None for slot in slots}
+        #named stat modifiers such as buffs and status effects: name -> (power, defense)
+        self.modifiers:Dict[str, Tuple[int,int]] = {}
+        #cached (power, defense) totals, None when they need recomputing
+        self._bonuses:Optional[Tuple[int,int]] = None
+
+        if weapon is not None:
+            self.slots["weapon"] = weapon
+        if armor is not None:
+            self.slots["armor"] = armor
+
+    def __setstate__(self, state:Any) -> None:
+        state = state_to_dict(state)
+
+        if "slots" not in state:
+            #saves from before slots were configurable
+            state["slots"] = {slot: state.pop(slot, None) for slot in DEFAULT_SLOTS}
+            state["modifiers"] = {}
+            state["_bonuses"] = None
+
+        super().__setstate__(state)
 
     @property
-    def defense_bonus(self) -> int:
-        bonus = 0
+    def bonuses(self) -> Tuple[int,int]:
+        """Return the total (power, defense) bonus of equipped items and modifiers"""
+        if self._bonuses is None:
+            power, defense = 0, 0
+
+            for item in self.slots.values():
+                if item is not None and item.equippable is not None:
+                    power += item.equippable.power_bonus
+                    defense += item.equippable.defense_bonus
 
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.defense_bonus
-        
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.defense_bonus
+            for modifier_power, modifier_defense in self.modifiers.values():
+                power += modifier_power
+                defense += modifier_defense
 
-        return bonus
+            self._bonuses = power, defense
+
+        return self._bonuses
+
+    @property
+    def defense_bonus(self) -> int:
+        return self.bonuses[1]
     
     @property
     def power_bonus(self) -> int:
-        bonus = 0
+        return self.bonuses[0]
+
+    def invalidate_bonuses(self) -> None:
+        """Mark the cached bonuses stale, call after anything contributing to them changes"""
+        self._bonuses = None
+
+        if hasattr(self, "parent"):
+            self.parent.fighter.update_bonuses()
 
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.power_bonus
-        
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.power_bonus
+    def add_modifier(self, name:str, power_bonus:int = 0, defense_bonus:int = 0) -> None:
+        """Add or replace a named modifier, e.g. a buff or status effect"""
+        self.modifiers[name] = power_bonus, defense_bonus
+        self.invalidate_bonuses()
 
-        return bonus
+    def remove_modifier(self, name:str) -> None:
+        if self.modifiers.pop(name, None) is not None:
+            self.invalidate_bonuses()
     
+    def clone(self, parent:Actor) -> Equipment:
+        """Return a copy equipping the matching items of `parent`s already cloned inventory"""
+        clone = super().clone(parent)
+        clone.slots = dict(self.slots)
+        clone.modifiers = dict(self.modifiers)
+
+        for slot, item in self.slots.items():
+            if item is not None:
+                index = self.parent.inventory.items.index(item)
+                clone.slots[slot] = parent.inventory.items[index]
+
+        return clone
+
     def item_is_equipped(self, item:Item) -> bool:
-        return self.weapon == item or self.armor == item
+        return any(equipped is item for equipped in self.slots.values())
     
     def unequip_message(self, item_name:str) -> None:
         self.parent.map.engine.message_log.add_message(
@@ -53,34 +117,33 @@ class Equipment(BaseComponent):
         )
 
     def equip_to_slot(self, slot:str, item:Item, add_message:bool) -> None:
-        current_item = getattr(self, slot)
+        current_item = self.slots.get(slot)
 
         if current_item is not None:
             self.unequip_from_slot(slot, add_message)
 
-        setattr(self, slot, item)
+        self.slots[slot] = item
+        self.invalidate_bonuses()
 
         if add_message:
             self.equip_message(item.name)
 
-    def unequip_from_slot(self, slot:str, item:Item, add_message:bool) -> None:
-        current_item = getattr(self, slot)
+    def unequip_from_slot(self, slot:str, add_message:bool) -> None:
+        current_item = self.slots[slot]
 
         if add_message:
             self.unequip_message(current_item.name)
 
-        setattr(self, slot, item)
+        self.slots[slot] = None
+        self.invalidate_bonuses()
 
     def toggle_equip(self, equippable_item:Item, add_message:bool = True) -> None:
-        if (
-            equippable_item.equippable
-            and equippable_item.equippable.equipment_type == EquipmentType.WEAPON
-        ):
-            slot = "weapon"
+        if equippable_item.equippable:
+            slot = slot_for(equippable_item.equippable.equipment_type)
         else:
             slot = "armor"
 
-        if getattr(self, slot) == equippable_item:
+        if self.slots.get(slot) is equippable_item:
             self.unequip_from_slot(slot, add_message)
         else:
             self.equip_to_slot(slot, equippable_item, add_message)
\ No newline at end of file
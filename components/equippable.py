@@ -9,6 +9,8 @@ if TYPE_CHECKING:
     from entity import Item
 
 class Equippable(BaseComponent):
+    __slots__ = ("equipment_type", "power_bonus", "defense_bonus")
+
     parent:Item
 
     def __init__(
@@ -22,17 +24,25 @@ class Equippable(BaseComponent):
         self.defense_bonus = defense_bonus
 
 class Dagger(Equippable):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(equipment_type=EquipmentType.WEAPON, power_bonus=2)
 
 class Sword(Equippable):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(equipment_type=EquipmentType.WEAPON, power_bonus=4)
 
 class LeatherArmor(Equippable):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(equipment_type=EquipmentType.ARMOR, defense_bonus=1)
 
 class ChainMail(Equippable):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(equipment_type=EquipmentType.ARMOR, defense_bonus=3)
\ No newline at end of file
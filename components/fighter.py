@@ -1,34 +1,95 @@
 from __future__ import annotations
 
+from actor_store import StoredField
 import color
 from components.base_component import BaseComponent
 from render_order import RenderOrder
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from actor_store import ActorStore
     from entity import Actor
 
 class Fighter(BaseComponent):
+    __slots__ = ("_max_hp", "_hp", "_base_defense", "_base_power", "store", "row")
+
     parent:Actor
 
+    #stored in the map's ActorStore while the actor is on a map
+    max_hp = StoredField()
+    base_defense = StoredField()
+    base_power = StoredField()
+
     def __init__(self, hp:int, base_defense:int, base_power:int):
+        self.store:Optional[ActorStore] = None
+        self.row = -1
         self.max_hp = hp
         self._hp = hp
         self.base_defense = base_defense
         self.base_power = base_power
 
+    def __setstate__(self, state) -> None:
+        #saves from before the ActorStore have no store or row
+        self.store = None
+        self.row = -1
+        super().__setstate__(state)
+
     @property
     def hp(self) -> int:
-        return self._hp
+        if self.store is None:
+            return self._hp
+        return int(self.store.hp[self.row])
     
     @hp.setter
     def hp(self, value:int) -> None:
-        self._hp = max(0, min(value, self.max_hp))
+        hp = max(0, min(value, self.max_hp))
 
-        if self._hp == 0 and self.parent.ai:
+        if self.store is None:
+            self._hp = hp
+        else:
+            self.store.hp[self.row] = hp
+
+        if hp == 0 and self.parent.ai:
             self.die()
 
+    def attach(self, store:ActorStore, row:int) -> None:
+        """Move this fighter's stats into a row of an ActorStore"""
+        store.hp[row] = self.hp
+        store.max_hp[row] = self.max_hp
+        store.base_power[row] = self.base_power
+        store.base_defense[row] = self.base_defense
+        self.store = store
+        self.row = row
+        self.update_bonuses()
+
+    def detach(self) -> None:
+        """Move this fighter's stats out of its ActorStore row"""
+        hp, max_hp = self.hp, self.max_hp
+        base_power, base_defense = self.base_power, self.base_defense
+        self.store = None
+        self.row = -1
+        self._hp, self.max_hp = hp, max_hp
+        self.base_power, self.base_defense = base_power, base_defense
+
+    def update_bonuses(self) -> None:
+        """Copy the equipment bonuses into the store, call after equipment changes"""
+        if self.store is not None:
+            self.store.power_bonus[self.row] = self.power_bonus
+            self.store.defense_bonus[self.row] = self.defense_bonus
+
+    def clone(self, parent:Actor) -> Fighter:
+        clone = super().clone(parent)
+
+        if self.store is not None:
+            #the clone starts off any map, with its own copy of the stats
+            clone.store = None
+            clone.row = -1
+            clone._hp, clone.max_hp = self.hp, self.max_hp
+            clone.base_power, clone.base_defense = self.base_power, self.base_defense
+
+        return clone
+
     @property
     def defense(self) -> int:
         return self.base_defense + self.defense_bonus
@@ -61,10 +122,11 @@ class Fighter(BaseComponent):
 
         self.parent.char = "%"
         self.parent.color = (191, 0, 0)
-        self.parent.blocks_movement = False
+        self.map.set_blocks_movement(self.parent, False)
         self.parent.ai = None
+        self.map.remove_actor(self.parent)
         self.parent.name = f"remains of {self.parent.name}"
-        self.parent.render_order = RenderOrder.CORPSE
+        self.map.set_render_order(self.parent, RenderOrder.CORPSE)
 
         self.engine.message_log.add_message(death_message, fg=death_color)
         
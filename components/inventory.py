@@ -7,12 +7,23 @@ if TYPE_CHECKING:
     from entity import Actor, Item
 
 class Inventory(BaseComponent):
+    __slots__ = ("capacity", "items")
+
     parent:Actor
 
     def __init__(self, capacity:int):
         self.capacity = capacity
         self.items:List[Item] = []
 
+    def clone(self, parent:Actor) -> Inventory:
+        clone = super().clone(parent)
+        clone.items = [item.clone() for item in self.items]
+
+        for item in clone.items:
+            item.parent = clone
+
+        return clone
+
     def drop(self, item:Item) -> None:
         self.items.remove(item)
         item.place(self.parent.x, self.parent.y, self.map)
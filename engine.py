@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING, Tuple
 
 import lzma
 import pickle
@@ -11,29 +11,88 @@ from tcod.map import compute_fov
 import exceptions
 import render_functions
 from message_log import MessageLog
+from random_streams import RandomStreams
+from turn_scheduler import action_time
 
 if TYPE_CHECKING:
     from entity import Actor
     from game_map import GameMap, GameWorld
 
+FOV_RADIUS = 8
+#number of recent FOV results kept per map
+FOV_CACHE_SIZE = 32
+
 class Engine:
 
     map:GameMap
     world:GameWorld
 
-    def __init__(self, player:Actor):
+    def __init__(self, player:Actor, seed:Optional[int] = None):
         self.player = player
+        #every random number in the game is drawn from these, see random_streams
+        self.rng = RandomStreams(seed)
         self.message_log = MessageLog()
-        self.mouse_position = (0,0)
+        self._mouse_position = (0,0)
+        #bumped whenever something drawn by render changes, see render_revision
+        self.revision = 0
+
+    def __setstate__(self, state:dict) -> None:
+        if "rng" not in state:
+            #older saves kept the seed on the world, if at all
+            state["rng"] = RandomStreams(getattr(state.get("world"), "seed", None))
+        if "_mouse_position" not in state:
+            #saves from before render revisions
+            state["_mouse_position"] = state.pop("mouse_position", (0,0))
+            state["revision"] = 0
+        self.__dict__.update(state)
+
+        #everything else is loaded by now, maps from old saves can index their entities
+        self.map.index_loaded_entities()
+        self.map.expand()
+
+    @property
+    def mouse_position(self) -> Tuple[int,int]:
+        return self._mouse_position
+
+    @mouse_position.setter
+    def mouse_position(self, value:Tuple[int,int]) -> None:
+        if value != self._mouse_position:
+            self._mouse_position = value
+            self.mark_dirty()
+
+    @property
+    def render_revision(self) -> Tuple[int,int]:
+        """Changes whenever the engine state drawn on screen may have changed"""
+        return self.revision, self.message_log.revision
+
+    def mark_dirty(self) -> None:
+        self.revision += 1
 
     def handle_enemy_turns(self) -> None:
-        for entity in set(self.map.actors) - {self.player}:
+        self.map.update_perception(self.player)
+        #only actors perceiving the player chase it, skip the full map search when there are none
+        if self.map.aware_actors:
+            self.map.update_flow_field(self.player.x, self.player.y)
+
+        scheduler = self.map.scheduler
+
+        for entity in scheduler.advance(action_time(self.player.speed)):
             if entity.ai:
                 try:
                     entity.ai.perform()
                 except exceptions.Impossible:
                     pass
 
+            if not entity.is_alive:
+                continue
+
+            distance = max(abs(entity.x - self.player.x), abs(entity.y - self.player.y))
+
+            if entity.ai.is_idle and distance > self.world.activation_radius:
+                self.map.put_to_sleep(entity)
+            else:
+                scheduler.add(entity)
+
     def render(self, console:Console) -> None:
         self.map.render(console)
 
@@ -55,15 +114,57 @@ class Engine:
         render_functions.render_names_at_mouse(console=console, x=21, y=44, engine=self)
 
     def update_fov(self) -> None:
-        """Recompute the visible area based on the player current point of view"""
-        self.map.visible[:] = compute_fov(
-            self.map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8
+        """Recompute the visible area based on the player current point of view
+
+        Only the window within FOV_RADIUS of the player is computed and written, so the
+        cost doesn't depend on the map size. Results are cached per map, standing still
+        or returning to a recently visited spot reuses the previous result.
+        """
+        game_map = self.map
+        x, y = self.player.x, self.player.y
+
+        key = (x, y, FOV_RADIUS, game_map.tiles_revision)
+        if key == game_map.fov_key:
+            return
+
+        fov_cache = game_map.fov_cache
+        cached = fov_cache.get(key)
+
+        if cached is None:
+            window = game_map.get_window(x, y, FOV_RADIUS)
+            visible = compute_fov(
+                game_map.transparent[window],
+                (x - window[0].start, y - window[1].start),
+                radius=FOV_RADIUS
+            )
+            fov_cache[key] = window, visible
+
+            if len(fov_cache) > FOV_CACHE_SIZE:
+                fov_cache.popitem(last=False)
+
+            #a cached result was already merged when it was first computed
+            game_map.explored[window] |= visible
+        else:
+            window, visible = cached
+            fov_cache.move_to_end(key)
+
+        if game_map.fov_window is not None:
+            game_map.visible[game_map.fov_window] = False
+
+        game_map.visible[window] = visible
+        game_map.fov_window = window
+        game_map.fov_key = key
+        self.mark_dirty()
+
+        #monsters coming into view are woken up
+        game_map.wake_in_area(
+            x - FOV_RADIUS,
+            y - FOV_RADIUS,
+            x + FOV_RADIUS,
+            y + FOV_RADIUS,
+            mask=game_map.visible,
         )
 
-        self.map.explored |= self.map.visible
-
     def save_as(self, filename:str) -> None:
         save_data = lzma.compress(pickle.dumps(self))
         with open(filename, "wb") as f:
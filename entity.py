@@ -6,6 +6,7 @@ from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
 from components.level import Level
 from render_order import RenderOrder
+from slotted import Slotted
 
 if TYPE_CHECKING:
     from components.ai import BaseAI
@@ -18,10 +19,12 @@ if TYPE_CHECKING:
 
 T = TypeVar("T", bound="Entity")
 
-class Entity:
+class Entity(Slotted):
     """
     A generic object to represent player, enemy, item etc.
     """
+    __slots__ = ("parent", "x", "y", "char", "color", "name", "blocks_movement", "render_order")
+
     parent: Union[GameMap,Inventory]
 
     def __init__(
@@ -45,7 +48,7 @@ class Entity:
 
         if map:
             self.parent = map
-            map.entities.add(self)
+            map.add_entity(self)
 
 
     @property
@@ -53,34 +56,47 @@ class Entity:
         return self.parent.map
 
     def move(self, dx:int, dy:int) -> None:
-        self.x += dx
-        self.y += dy
+        self.map.move_entity(self, self.x + dx, self.y + dy)
+
 
+    def clone(self:T) -> T:
+        """Return a fresh copy of this instance, used to create entities from prototypes.
+
+        Immutable fields are shared with the prototype, components are cloned.
+        """
+        return copy.copy(self)
 
     def spawn(self: T, gamemap:GameMap, x:int, y:int) -> T:
         """Spawn a copy of this instance at a given location"""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
     
     def place(self, x:int, y:int, map:Optional[GameMap] = None) -> None:
         """Place this entity at a new location. Handles moving across game map"""
+        on_map = hasattr(self, "parent") and self.parent is self.map
+
+        if on_map and not map:
+            self.map.move_entity(self, x, y)
+            return
+
         self.x = x
         self.y = y
         if map:
-            if hasattr(self, "parent"):
-                if self.parent is self.map:
-                    self.map.entities.remove(self)
+            if on_map:
+                self.map.remove_entity(self)
             self.parent = map
-            map.entities.add(self)
+            map.add_entity(self)
 
     def distance(self, x:int, y:int) -> float:
         return math.sqrt((x - self.x)**2 + (y - self.y)**2)
 
 class Actor(Entity):
+    __slots__ = ("speed", "perception_radius", "ai_cls", "ai", "fighter", "inventory", "equipment", "level")
+
     def __init__(
             self, 
             *,
@@ -94,9 +110,17 @@ class Actor(Entity):
             equipment:Equipment,
             inventory:Inventory,
             level:Level,
+            speed:int = 100,
+            perception_radius:int = 8,
             ):
         super().__init__(x=x, y=y, char=char, color=color, name=name, blocks_movement=True, render_order=RenderOrder.ACTOR)
 
+        #percentage of normal speed, see turn_scheduler.action_time
+        self.speed = speed
+        #how far this actor can notice the player, if it's in line of sight
+        self.perception_radius = perception_radius
+
+        self.ai_cls = ai_cls
         self.ai:Optional[BaseAI] = ai_cls(self)
 
         self.fighter = fighter
@@ -111,12 +135,29 @@ class Actor(Entity):
         self.level = level
         self.level.parent = self
 
+    def __setstate__(self, state) -> None:
+        #saves from before speed and perception
+        self.speed = 100
+        self.perception_radius = 8
+        super().__setstate__(state)
+
+    def clone(self) -> Actor:
+        clone = super().clone()
+        clone.ai = self.ai_cls(clone)
+        clone.fighter = self.fighter.clone(clone)
+        clone.inventory = self.inventory.clone(clone)
+        clone.equipment = self.equipment.clone(clone)
+        clone.level = self.level.clone(clone)
+        return clone
+
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions"""
         return bool(self.ai)
     
 class Item(Entity):
+    __slots__ = ("consumable", "equippable")
+
     def __init__(
             self,
             *, 
@@ -145,4 +186,14 @@ class Item(Entity):
         self.equippable = equippable
 
         if self.equippable:
-            self.equippable.parent = self
\ No newline at end of file
+            self.equippable.parent = self
+
+    def clone(self) -> Item:
+        clone = super().clone()
+
+        if self.consumable:
+            clone.consumable = self.consumable.clone(clone)
+        if self.equippable:
+            clone.equippable = self.equippable.clone(clone)
+
+        return clone
\ No newline at end of file
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import io
+import lzma
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, Dict, Optional, TYPE_CHECKING
+import weakref
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+#memory kept for visited floors that are not being played
+DEFAULT_MEMORY_BUDGET = 8 * 1024 * 1024
+
+class _FloorPickler(pickle.Pickler):
+    """Pickles a floor without the engine and player it refers to"""
+    def __init__(self, file:io.BytesIO, engine:Engine):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.engine = engine
+
+    def persistent_id(self, obj:Any) -> Optional[str]:
+        if obj is self.engine:
+            return "engine"
+        if obj is self.engine.player:
+            return "player"
+        return None
+
+class _FloorUnpickler(pickle.Unpickler):
+    def __init__(self, file:io.BytesIO, engine:Engine):
+        super().__init__(file)
+        self.engine = engine
+
+    def persistent_load(self, pid:str) -> Any:
+        if pid == "engine":
+            return self.engine
+        if pid == "player":
+            return self.engine.player
+        raise pickle.UnpicklingError(f"Unknown persistent id {pid!r}")
+
+class FloorStore:
+    """Visited floors that are not being played, by floor number.
+
+    Recently visited floors are kept compacted in memory, least recently used first.
+    Once their estimated size goes over `memory_budget` the oldest ones are spilled
+    to compressed files in a temporary directory and loaded back when requested.
+    """
+    def __init__(self, engine:Engine, memory_budget:int = DEFAULT_MEMORY_BUDGET):
+        self.engine = engine
+        self.memory_budget = memory_budget
+
+        self._floors:OrderedDict[int, GameMap] = OrderedDict()
+        self._sizes:Dict[int, int] = {}
+        self._memory_used = 0
+
+        #floor number -> path of its compressed file
+        self._spilled:Dict[int, str] = {}
+        self._directory:Optional[str] = None
+
+    def __contains__(self, floor_number:int) -> bool:
+        return floor_number in self._floors or floor_number in self._spilled
+
+    def __len__(self) -> int:
+        return len(self._floors) + len(self._spilled)
+
+    @property
+    def memory_used(self) -> int:
+        return self._memory_used
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        #spilled floors are saved as their compressed data, they go back to disk on load
+        state["_spilled"] = {
+            floor_number: self._read(path) for floor_number, path in self._spilled.items()
+        }
+        state["_directory"] = None
+        return state
+
+    def __setstate__(self, state:dict) -> None:
+        blobs = state.pop("_spilled")
+        self.__dict__.update(state)
+        self._spilled = {}
+
+        for floor_number, blob in blobs.items():
+            self._spilled[floor_number] = self._write(floor_number, blob)
+
+    def put(self, floor_number:int, game_map:GameMap) -> None:
+        """Store a floor the player just left"""
+        self._discard(floor_number)
+        game_map.compact()
+
+        size = game_map.nbytes
+        self._floors[floor_number] = game_map
+        self._sizes[floor_number] = size
+        self._memory_used += size
+
+        #always keep the floor just stored in memory, the player is likely to come back
+        while self._memory_used > self.memory_budget and len(self._floors) > 1:
+            oldest = next(iter(self._floors))
+            self._spill(oldest)
+
+    def pop(self, floor_number:int) -> Optional[GameMap]:
+        """Take a stored floor out of the store, ready to be played, or None if it was never stored"""
+        game_map = self._floors.pop(floor_number, None)
+
+        if game_map is not None:
+            self._memory_used -= self._sizes.pop(floor_number)
+        elif floor_number in self._spilled:
+            path = self._spilled.pop(floor_number)
+            game_map = self._load(self._read(path))
+            os.remove(path)
+        else:
+            return None
+
+        game_map.expand()
+        return game_map
+
+    def _discard(self, floor_number:int) -> None:
+        if floor_number in self._floors:
+            del self._floors[floor_number]
+            self._memory_used -= self._sizes.pop(floor_number)
+        elif floor_number in self._spilled:
+            os.remove(self._spilled.pop(floor_number))
+
+    def _spill(self, floor_number:int) -> None:
+        game_map = self._floors.pop(floor_number)
+        self._memory_used -= self._sizes.pop(floor_number)
+        self._spilled[floor_number] = self._write(floor_number, self._dump(game_map))
+
+    def _dump(self, game_map:GameMap) -> bytes:
+        buffer = io.BytesIO()
+        _FloorPickler(buffer, self.engine).dump(game_map)
+        return lzma.compress(buffer.getvalue())
+
+    def _load(self, blob:bytes) -> GameMap:
+        buffer = io.BytesIO(lzma.decompress(blob))
+        return _FloorUnpickler(buffer, self.engine).load()
+
+    def _write(self, floor_number:int, blob:bytes) -> str:
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="floors-")
+            weakref.finalize(self, shutil.rmtree, self._directory, ignore_errors=True)
+
+        path = os.path.join(self._directory, f"floor-{floor_number}.xz")
+        with open(path, "wb") as f:
+            f.write(blob)
+        return path
+
+    @staticmethod
+    def _read(path:str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
@@ -1,17 +1,50 @@
 from __future__ import annotations
 
-from typing import Iterable, TYPE_CHECKING, Iterator, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, TYPE_CHECKING, Iterator, List, Optional, Set, Tuple
 
 import numpy as np #type:ignore
+import tcod.constants
+import tcod.path
 from tcod.console import Console
+from tcod.map import compute_fov
+from actor_store import ACTOR_DT, ActorStore
 from entity import Actor, Item
+from floor_store import DEFAULT_MEMORY_BUDGET, FloorStore
 
+import random_streams
+from render_order import RenderOrder
 import tile_types
+from turn_scheduler import TurnScheduler
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity 
 
+NEIGHBOURS = (
+    (-1, -1), (0, -1), (1, -1),
+    (-1, 0), (1, 0),
+    (-1, 1), (0, 1), (1, 1),
+)
+
+#side length of the square regions dormant actors are bucketed by
+REGION_SIZE = 8
+
+#approximate memory taken by an entity and its components, see benchmarks/entity_memory.py
+ENTITY_NBYTES = 1024
+
+class PackedMask:
+    """A 2D boolean array stored with one bit per cell"""
+    def __init__(self, mask:np.ndarray):
+        self.shape = mask.shape
+        self.bits = np.packbits(mask.ravel(order="F"))
+
+    def unpack(self) -> np.ndarray:
+        """Return the mask as a regular Fortran ordered boolean array"""
+        size = self.shape[0] * self.shape[1]
+        return np.unpackbits(self.bits, count=size).view(bool).reshape(self.shape, order="F")
+
 class GameMap:
     def __init__(
             self, engine:Engine, width:int, height:int, entities:Iterable[Entity] = ()
@@ -19,9 +52,45 @@ class GameMap:
         self.engine = engine
         self.width, self.height = width, height
 
-        self.entities = set(entities)
+        self.entities:Set[Entity] = set()
+
+        #living actors, kept up to date on add, remove and death
+        self.live_actors:Set[Actor] = set()
+        #positions and combat stats of the living actors as NumPy columns
+        self.actor_store = ActorStore()
+        #schedules every awake living actor except the player
+        self.scheduler = TurnScheduler()
+        #sleeping actors by region, they are not scheduled until woken, see put_to_sleep
+        self._dormant_regions:Dict[Tuple[int,int], Set[Actor]] = {}
+        self._dormant_at:Dict[Actor, Tuple[int,int]] = {}
+
+        #spatial index: cell -> entities standing on it, and a count of blocking entities per cell
+        self._buckets:Dict[Tuple[int,int], Set[Entity]] = {}
+        self._indexed_at:Dict[Entity, Tuple[int,int]] = {}
+        self.blocking = np.zeros((width, height), dtype=np.uint8, order="F")
+        #count of entities per cell for each render order, drawn bottom layer first
+        self.render_layers:Dict[RenderOrder, np.ndarray] = {
+            render_order: np.zeros((width, height), dtype=np.uint8, order="F")
+            for render_order in sorted(RenderOrder, key=lambda x: x.value)
+        }
+        #bumped every time a blocking entity enters, leaves or moves within the index
+        self.blocking_revision = 0
+
+        #tile type indices into the tile_types registry
+        self.tiles = np.full(
+            (width, height), fill_value=tile_types.wall, dtype=tile_types.tile_index_dt, order="F"
+        )
+        #tile properties gathered from the registry, keyed by field name, see _get_tile_property
+        self._tile_properties:Dict[str, Tuple[int, np.ndarray]] = {}
+
+        #bumped by set_tiles, used to invalidate anything derived from the tiles
+        self.tiles_revision = 0
 
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        #pathfinding cost kept in sync by set_tiles and the spatial index, see get_path_cost
+        self.path_cost = np.zeros((width, height), dtype=np.int8, order="F")
+
+        for entity in entities:
+            self.add_entity(entity)
 
         self.visible = np.full(
             (width, height), fill_value=False, order="F"
@@ -29,17 +98,164 @@ class GameMap:
         self.explored = np.full(
             (width, height), fill_value=False, order="F"
             )
+
+        #recent FOV results keyed by (x, y, radius, tiles_revision), least recently used first.
+        #Each result is the window it covers and the visibility inside that window.
+        self.fov_cache:OrderedDict[Tuple[int,int,int,int], Tuple[Tuple[slice,slice], np.ndarray]] = OrderedDict()
+        self.fov_key:Optional[Tuple[int,int,int,int]] = None
+        #the part of `visible` that may hold True values
+        self.fov_window:Optional[Tuple[slice,slice]] = None
         
         self.downstairs_location = (0,0)
+        #None on the first floor, which has no way up
+        self.upstairs_location:Optional[Tuple[int,int]] = None
+        #where the player arrives on this floor
+        self.entry_location = (0,0)
+
+        #distance-to-player map shared by all chasing AIs, see update_flow_field
+        self.flow_field:Optional[np.ndarray] = None
+        self._flow_field_key:Optional[Tuple[int,int,int,int]] = None
+
+        #actors that could perceive the player at the start of this turn, see update_perception
+        self.aware_actors:Set[Actor] = set()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        #caches are rebuilt on demand, keep them out of save files
+        state["fov_cache"] = OrderedDict()
+        state["_tile_properties"] = {}
+        state["flow_field"] = None
+        state["_flow_field_key"] = None
+        #rebuilt by expand from the tiles and the spatial index
+        for name in ("blocking", "render_layers", "path_cost"):
+            state[name] = None
+        #stored floors are already compacted
+        if not isinstance(self.visible, PackedMask):
+            state["visible"] = PackedMask(self.visible)
+            state["explored"] = PackedMask(self.explored)
+        return state
+
+    def __setstate__(self, state:dict) -> None:
+        if "_buckets" not in state:
+            state = self._upgrade_state(state)
+        state.setdefault("upstairs_location", None)
+        #maps load compacted, Engine.__setstate__ and FloorStore.pop expand them
+        self.__dict__.update(state)
+
+    @staticmethod
+    def _upgrade_state(state:dict) -> dict:
+        """Convert the state of a map saved before the spatial index to the current layout.
+
+        The entities may still be loading at this point, so they are only indexed
+        by `index_loaded_entities` once the whole save is loaded.
+        """
+        game_map = GameMap(state["engine"], state["width"], state["height"])
+        game_map.tiles = tile_types.tile_indices(state["tiles"])
+        game_map._update_path_cost(np.s_[:, :])
+        game_map.visible = np.asfortranarray(state["visible"])
+        game_map.explored = np.asfortranarray(state["explored"])
+        game_map.downstairs_location = state["downstairs_location"]
+
+        upgraded = game_map.__dict__
+        upgraded["_loaded_entities"] = state["entities"]
+        return upgraded
+
+    def index_loaded_entities(self) -> None:
+        """Index the entities of a map loaded from an old save, see _upgrade_state"""
+        for entity in self.__dict__.pop("_loaded_entities", ()):
+            self.add_entity(entity)
+
+    def compact(self) -> None:
+        """Shrink this map while it's not being played.
+
+        The visibility masks are packed to one bit per cell, caches are dropped and so are
+        the grids derived from the tiles and entities.
+        Call `expand` before using the map again.
+        """
+        if isinstance(self.visible, PackedMask):
+            return
+
+        self.visible = PackedMask(self.visible)
+        self.explored = PackedMask(self.explored)
+        self.fov_cache.clear()
+        self._tile_properties.clear()
+        self.flow_field = None
+        self._flow_field_key = None
+        self.blocking = None
+        self.render_layers = None
+        self.path_cost = None
+
+    def expand(self) -> None:
+        """Undo `compact`, unpacking the visibility masks and rebuilding the derived grids"""
+        if isinstance(self.visible, PackedMask):
+            self.visible = self.visible.unpack()
+        if isinstance(self.explored, PackedMask):
+            self.explored = self.explored.unpack()
+        if self.path_cost is None:
+            self._rebuild_grids()
+
+    def _rebuild_grids(self) -> None:
+        """Recompute the blocking counts, render layers and path cost from the spatial index"""
+        shape = self.width, self.height
+        self.blocking = np.zeros(shape, dtype=np.uint8, order="F")
+        self.render_layers = {
+            render_order: np.zeros(shape, dtype=np.uint8, order="F")
+            for render_order in sorted(RenderOrder, key=lambda x: x.value)
+        }
+
+        for entity, location in self._indexed_at.items():
+            self.render_layers[entity.render_order][location] += 1
+            if entity.blocks_movement:
+                self.blocking[location] += 1
+
+        self.path_cost = np.zeros(shape, dtype=np.int8, order="F")
+        self._update_path_cost(np.s_[:, :])
+
+    @property
+    def nbytes(self) -> int:
+        """Rough estimate of the memory taken by this map and its entities"""
+        arrays = [value for value in self.__dict__.values() if isinstance(value, np.ndarray)]
+        arrays += (self.render_layers or {}).values()
+        arrays += [getattr(self.actor_store, name) for name in ACTOR_DT]
+
+        size = sum(array.nbytes for array in arrays)
+        size += sum(
+            mask.bits.nbytes for mask in (self.visible, self.explored) if isinstance(mask, PackedMask)
+        )
+        return size + len(self.entities) * ENTITY_NBYTES
+
+    def _get_tile_property(self, name:str) -> np.ndarray:
+        """Gather a tile_dt field for every cell, cached until the tiles change"""
+        cached = self._tile_properties.get(name)
+
+        if cached is None or cached[0] != self.tiles_revision:
+            values = tile_types.tile_table()[name][self.tiles]
+            values.flags.writeable = False
+            cached = self.tiles_revision, values
+            self._tile_properties[name] = cached
+
+        return cached[1]
+
+    @property
+    def walkable(self) -> np.ndarray:
+        return self._get_tile_property("walkable")
+
+    @property
+    def transparent(self) -> np.ndarray:
+        return self._get_tile_property("transparent")
+
+    @property
+    def light(self) -> np.ndarray:
+        return self._get_tile_property("light")
+
+    @property
+    def dark(self) -> np.ndarray:
+        return self._get_tile_property("dark")
 
     @property
     def actors(self) -> Iterator[Actor]:
         """Iterate over this maps living actors"""
-        yield from (
-            entity 
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
-        )
+        yield from tuple(self.live_actors)
 
     @property
     def map(self) -> GameMap:
@@ -49,26 +265,319 @@ class GameMap:
     def items(self) -> Iterator[Item]:
         yield from (entity for entity in self.entities if isinstance(entity, Item))
 
+    def add_entity(self, entity:Entity) -> None:
+        """Add an entity to this map and index it at its current position"""
+        if entity in self._indexed_at:
+            self._unindex(entity)
+
+        self.entities.add(entity)
+        self._index(entity)
+
+        if isinstance(entity, Actor) and entity.is_alive:
+            self.live_actors.add(entity)
+            self.actor_store.add(entity)
+            if entity is not self.engine.player:
+                self.scheduler.add(entity)
+
+    def remove_entity(self, entity:Entity) -> None:
+        """Remove an entity from this map and from the spatial index"""
+        self.entities.remove(entity)
+        self._unindex(entity)
+        self.remove_actor(entity)
+
+    def remove_actor(self, entity:Entity) -> None:
+        """Stop treating an entity as a living actor, e.g. after it died"""
+        self.live_actors.discard(entity)
+        self.scheduler.remove(entity)
+        self.actor_store.remove(entity)
+
+        if entity in self._dormant_at:
+            self._remove_dormant(entity)
+
+    def is_dormant(self, actor:Actor) -> bool:
+        return actor in self._dormant_at
+
+    def put_to_sleep(self, actor:Actor) -> None:
+        """Take an actor out of the turn loop until something wakes it up"""
+        self.scheduler.remove(actor)
+
+        region = actor.x // REGION_SIZE, actor.y // REGION_SIZE
+        self._dormant_at[actor] = region
+        self._dormant_regions.setdefault(region, set()).add(actor)
+
+    def wake(self, actor:Actor) -> None:
+        """Return a dormant actor to the turn loop"""
+        self._remove_dormant(actor)
+        self.scheduler.add(actor)
+
+    def _remove_dormant(self, actor:Actor) -> None:
+        region = self._dormant_at.pop(actor)
+        bucket = self._dormant_regions[region]
+        bucket.discard(actor)
+
+        if not bucket:
+            del self._dormant_regions[region]
+
+    def wake_in_area(
+            self, x1:int, y1:int, x2:int, y2:int, mask:Optional[np.ndarray] = None
+            ) -> None:
+        """Wake dormant actors inside the inclusive rectangle from (x1, y1) to (x2, y2).
+
+        If `mask` is given, only actors on cells where it's True are woken.
+        Only the regions overlapping the rectangle are visited.
+        """
+        for region_x in range(max(0, x1) // REGION_SIZE, max(0, x2) // REGION_SIZE + 1):
+            for region_y in range(max(0, y1) // REGION_SIZE, max(0, y2) // REGION_SIZE + 1):
+                for actor in tuple(self._dormant_regions.get((region_x, region_y), ())):
+                    if (
+                        x1 <= actor.x <= x2
+                        and y1 <= actor.y <= y2
+                        and (mask is None or mask[actor.x, actor.y])
+                    ):
+                        self.wake(actor)
+
+    def make_noise(self, x:int, y:int, radius:int) -> None:
+        """Wake dormant actors within `radius` (Chebyshev distance) of a noise"""
+        self.wake_in_area(x - radius, y - radius, x + radius, y + radius)
+
+    def move_entity(self, entity:Entity, x:int, y:int) -> None:
+        """Move an entity already on this map to a new position"""
+        self._unindex(entity)
+        entity.x = x
+        entity.y = y
+        self._index(entity)
+        self.actor_store.move(entity)
+
+    def set_blocks_movement(self, entity:Entity, blocks_movement:bool) -> None:
+        """Change whether an entity on this map blocks movement, keeping the index in sync"""
+        self._unindex(entity)
+        entity.blocks_movement = blocks_movement
+        self._index(entity)
+
+    def set_render_order(self, entity:Entity, render_order:RenderOrder) -> None:
+        """Change the render order of an entity on this map, keeping the render layers in sync"""
+        self._unindex(entity)
+        entity.render_order = render_order
+        self._index(entity)
+
+    def _index(self, entity:Entity) -> None:
+        location = entity.x, entity.y
+        self._indexed_at[entity] = location
+        self._buckets.setdefault(location, set()).add(entity)
+        self.render_layers[entity.render_order][location] += 1
+
+        if entity.blocks_movement:
+            self.blocking[location] += 1
+            self.blocking_revision += 1
+            self._update_path_cost(location)
+
+    def _unindex(self, entity:Entity) -> None:
+        location = self._indexed_at.pop(entity)
+        bucket = self._buckets[location]
+        bucket.discard(entity)
+
+        if not bucket:
+            del self._buckets[location]
+
+        self.render_layers[entity.render_order][location] -= 1
+
+        if entity.blocks_movement:
+            self.blocking[location] -= 1
+            self.blocking_revision += 1
+            self._update_path_cost(location)
+
+    def get_entities_at(self, x:int, y:int) -> Set[Entity]:
+        """Return the entities at the given location"""
+        return self._buckets.get((x, y), set())
+
+    def get_occupied(self, index=np.s_[:, :]) -> np.ndarray:
+        """Return a mask of the cells in a slice of the map holding at least one entity"""
+        occupied = np.zeros(self.tiles[index].shape, dtype=bool)
+        for layer in self.render_layers.values():
+            occupied |= layer[index] > 0
+        return occupied
+
     def get_blocking_entity_at(
             self, location_x:int, location_y:int
             ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                entity.blocks_movement 
-                and entity.x == location_x 
-                and entity.y == location_y
-                ):
+        if not self.in_bounds(location_x, location_y) or not self.blocking[location_x, location_y]:
+            return None
+
+        for entity in self.get_entities_at(location_x, location_y):
+            if entity.blocks_movement:
                 return entity
             
         return None
 
     def get_actor_at(self, x:int, y:int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.get_entities_at(x, y):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
             
         return None
 
+    def get_items_at(self, x:int, y:int) -> Iterator[Item]:
+        yield from (entity for entity in self.get_entities_at(x, y) if isinstance(entity, Item))
+
+    def set_tiles(self, index, tile:int) -> None:
+        """Assign a tile type from tile_types to a cell, slice or mask of the map"""
+        self.tiles[index] = tile
+        self.tiles_revision += 1
+        self._update_path_cost(index)
+
+    def _update_path_cost(self, index) -> None:
+        walkable = tile_types.tile_table()["walkable"][self.tiles[index]]
+        self.path_cost[index] = walkable + 10 * (walkable & (self.blocking[index] > 0))
+
+    def get_path_cost(self) -> np.ndarray:
+        """Return the movement cost array used for pathfinding.
+
+        Walls are 0 (impassable), floors are 1 and cells holding a blocking entity
+        cost 11 so paths route around other actors where they can.
+        The array is shared and maintained incrementally, so it's returned read-only.
+        """
+        cost = self.path_cost.view()
+        cost.flags.writeable = False
+        return cost
+
+    def update_flow_field(self, target_x:int, target_y:int) -> None:
+        """Recompute the distance-to-target flow field.
+
+        Skipped when the target, the blocking entities and the tiles are unchanged since the last call.
+        """
+        key = (target_x, target_y, self.blocking_revision, self.tiles_revision)
+        if key == self._flow_field_key:
+            return
+
+        distance = tcod.path.maxarray((self.width, self.height), dtype=np.int32, order="F")
+        distance[target_x, target_y] = 0
+        tcod.path.dijkstra2d(distance, self.get_path_cost(), 2, 3, out=distance)
+
+        self.flow_field = distance
+        self._flow_field_key = key
+
+    def update_perception(self, target:Actor) -> Tuple[Tuple[Actor, ...], np.ndarray]:
+        """Work out which awake actors can perceive `target` in one batch.
+
+        An actor perceives the target if it's within its perception radius and in line of sight.
+        Line of sight is symmetric, so a single FOV computed from the target with the largest
+        perception radius answers it for every actor at once.
+        Returns the actor table and a boolean array aligned with it.
+        """
+        actors = tuple(self.scheduler)
+        xs = np.fromiter((actor.x for actor in actors), dtype=np.intp, count=len(actors))
+        ys = np.fromiter((actor.y for actor in actors), dtype=np.intp, count=len(actors))
+        radii = np.fromiter(
+            (actor.perception_radius for actor in actors), dtype=np.intp, count=len(actors)
+        )
+
+        max_radius = int(radii.max()) if actors else 0
+        window = self.get_window(target.x, target.y, max_radius)
+        fov = compute_fov(
+            self.transparent[window],
+            (target.x - window[0].start, target.y - window[1].start),
+            radius=max_radius,
+            algorithm=tcod.constants.FOV_SYMMETRIC_SHADOWCAST,
+        )
+
+        local_xs = xs - window[0].start
+        local_ys = ys - window[1].start
+        aware = (
+            (local_xs >= 0) & (local_xs < fov.shape[0])
+            & (local_ys >= 0) & (local_ys < fov.shape[1])
+            & ((xs - target.x) ** 2 + (ys - target.y) ** 2 <= radii ** 2)
+        )
+        aware[aware] = fov[local_xs[aware], local_ys[aware]]
+
+        self.aware_actors = {actors[i] for i in np.flatnonzero(aware)}
+        return actors, aware
+
+    def _actor_rows_within(
+            self, x:int, y:int, radius:float, visible_only:bool, inclusive:bool = True
+            ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return a mask of ActorStore rows within `radius` of a point and their squared distances"""
+        store = self.actor_store
+        distance_squared = (store.x - x) ** 2 + (store.y - y) ** 2
+        if inclusive:
+            rows = store.alive & (distance_squared <= radius ** 2)
+        else:
+            rows = store.alive & (distance_squared < radius ** 2)
+
+        if visible_only:
+            rows[rows] = self.visible[store.x[rows], store.y[rows]]
+
+        return rows, distance_squared
+
+    def actors_within(
+            self, x:int, y:int, radius:float, visible_only:bool = False
+            ) -> List[Actor]:
+        """Return the living actors within `radius` (euclidean distance) of a point"""
+        rows, _ = self._actor_rows_within(x, y, radius, visible_only)
+        return [self.actor_store.actors[row] for row in np.flatnonzero(rows)]
+
+    def nearest_actor(
+            self,
+            x:int,
+            y:int,
+            radius:float,
+            visible_only:bool = False,
+            exclude:Optional[Actor] = None,
+            inclusive:bool = True,
+            ) -> Optional[Actor]:
+        """Return the living actor closest to a point within `radius`, or None.
+
+        With `inclusive` False actors exactly `radius` away are left out.
+        """
+        rows, distance_squared = self._actor_rows_within(x, y, radius, visible_only, inclusive)
+
+        if exclude is not None and exclude in self.actor_store:
+            rows[self.actor_store.rows[exclude]] = False
+
+        candidates = np.flatnonzero(rows)
+        if not len(candidates):
+            return None
+
+        nearest = candidates[np.argmin(distance_squared[candidates])]
+        return self.actor_store.actors[nearest]
+
+    def actors_in_mask(self, mask:np.ndarray) -> List[Actor]:
+        """Return the living actors standing on cells where `mask` is True"""
+        store = self.actor_store
+        rows = store.alive.copy()
+        rows[rows] = mask[store.x[rows], store.y[rows]]
+        return [store.actors[row] for row in np.flatnonzero(rows)]
+
+    def can_perceive(self, actor:Actor) -> bool:
+        """Return True if the actor perceived the player at the start of this turn"""
+        return actor in self.aware_actors
+
+    def descend_flow_field(self, x:int, y:int) -> Optional[Tuple[int,int]]:
+        """Return the free neighbouring cell closest to the flow field target.
+
+        Returns None if no neighbour gets closer than the current position.
+        """
+        assert self.flow_field is not None, "update_flow_field must be called first"
+
+        best = None
+        best_distance = self.flow_field[x, y]
+
+        for dx, dy in NEIGHBOURS:
+            next_x, next_y = x + dx, y + dy
+            if not self.in_bounds(next_x, next_y) or self.blocking[next_x, next_y]:
+                continue
+            if self.flow_field[next_x, next_y] < best_distance:
+                best = next_x, next_y
+                best_distance = self.flow_field[next_x, next_y]
+
+        return best
+
+    def get_window(self, x:int, y:int, radius:int) -> Tuple[slice,slice]:
+        """Return the area within `radius` of a point, clipped to the map, as a 2D array index"""
+        return (
+            slice(max(0, x - radius), min(self.width, x + radius + 1)),
+            slice(max(0, y - radius), min(self.height, y + radius + 1)),
+        )
+
     def in_bounds(self, x:int, y:int) -> bool:
         """Return True if x and y are in bounds of the map"""
         return 0 <= x < self.width and 0 <= y < self.height
@@ -82,22 +591,38 @@ class GameMap:
         Otherwise it's drawn as shroud.
         """
 
-        console.tiles_rgb[0:self.width, 0:self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=tile_types.SHROUD,
-        )
+        #visible cells are always explored, so this is 0, 1 or 2 as graphics_table expects
+        visibility = self.explored.view(np.uint8) + self.visible.view(np.uint8)
 
-        entities_sorted_for_rendering = sorted(
-            self.entities, key = lambda x: x.render_order.value
-        )
+        console.tiles_rgb[0:self.width, 0:self.height] = tile_types.graphics_table()[
+            visibility, self.tiles
+        ]
 
-        for entity in entities_sorted_for_rendering:
-            #only print entities in FOV
-            if self.visible[entity.x, entity.y]:
-                console.print(
-                    x=entity.x, y=entity.y, string=entity.char, fg=entity.color
-                    )
+        if self.fov_window is None:
+            return
+
+        #only entities in FOV are drawn, and only the FOV window can be visible
+        window = self.fov_window
+        visible = self.visible[window]
+        x_offset, y_offset = window[0].start, window[1].start
+
+        for render_order, layer in self.render_layers.items():
+            xs, ys = np.nonzero(visible & (layer[window] > 0))
+            if not len(xs):
+                continue
+            xs += x_offset
+            ys += y_offset
+
+            entities = [
+                next(
+                    entity for entity in self._buckets[x, y]
+                    if entity.render_order is render_order
+                )
+                for x, y in zip(xs.tolist(), ys.tolist())
+            ]
+
+            console.tiles_rgb["ch"][xs, ys] = [ord(entity.char) for entity in entities]
+            console.tiles_rgb["fg"][xs, ys] = [entity.color for entity in entities]
                 
 class GameWorld:
     def __init__(
@@ -110,6 +635,9 @@ class GameWorld:
             room_min_size:int,
             room_max_size:int,
             current_floor:int = 0,
+            activation_radius:int = 16,
+            floor_memory_budget:int = DEFAULT_MEMORY_BUDGET,
+            generator:str = "rooms",
     ):
         self.engine = engine
         self.map_width = map_width
@@ -118,16 +646,136 @@ class GameWorld:
         self.room_min_size = room_min_size
         self.room_max_size = room_max_size
         self.current_floor = current_floor
+        #idle monsters farther than this from the player are put to sleep
+        self.activation_radius = activation_radius
+
+        #name of the layout generator in map_generators.GENERATORS
+        self.generator = generator
 
-    def generate_floor(self) -> None:
+        #visited floors the player is not on
+        self.floors = FloorStore(engine, floor_memory_budget)
+
+        #the floor number being generated in the background and its result
+        self._pending_floor:Optional[Tuple[int, Future[GameMap]]] = None
+        self._executor:Optional[ThreadPoolExecutor] = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        #threads can't be saved, pre-generation restarts after loading
+        state["_pending_floor"] = None
+        state["_executor"] = None
+        return state
+
+    def __setstate__(self, state:dict) -> None:
+        #defaults for saves made before these settings existed
+        state.setdefault("activation_radius", 16)
+        state.setdefault("generator", "rooms")
+        state.setdefault("_pending_floor", None)
+        state.setdefault("_executor", None)
+        self.__dict__.update(state)
+        #saves from before the floor store only have the current floor
+        if "floors" not in state:
+            self.floors = FloorStore(self.engine)
+
+    def build_floor(
+            self, floor_number:int, timings:Optional[Dict[str,float]] = None
+    ) -> GameMap:
+        """Generate the given floor without entering it, see procgen.generate_dungeon"""
         from procgen import generate_dungeon
-        self.current_floor += 1
 
-        self.engine.map = generate_dungeon(
+        rng = self.engine.rng
+        return generate_dungeon(
             max_rooms=self.max_rooms,
             room_min_size=self.room_min_size,
             room_max_size=self.room_max_size,
             map_width=self.map_width,
             map_height=self.map_height,
-            engine=self.engine
-        )
\ No newline at end of file
+            engine=self.engine,
+            floor_number=floor_number,
+            layout_rng=rng.for_floor(floor_number, random_streams.LAYOUT),
+            spawn_rng=rng.for_floor(floor_number, random_streams.SPAWNS),
+            timings=timings,
+            generator=self.generator,
+        )
+
+    def pregenerate_next_floor(self) -> None:
+        """Start generating the floor below the current one in a worker thread"""
+        floor_number = self.current_floor + 1
+        if floor_number in self.floors:
+            self._pending_floor = None
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="procgen")
+
+        self._pending_floor = (
+            floor_number, self._executor.submit(self.build_floor, floor_number)
+        )
+
+    def _get_floor(self, floor_number:int) -> GameMap:
+        """Return a visited floor from the store, or the pre-generated or a newly generated one"""
+        dungeon = self.floors.pop(floor_number)
+        if dungeon is not None:
+            return dungeon
+
+        if self._pending_floor is not None:
+            pending_number, future = self._pending_floor
+            self._pending_floor = None
+
+            if pending_number == floor_number:
+                #still faster than starting over if it's not done yet, errors are raised here
+                return future.result()
+
+        return self.build_floor(floor_number)
+
+    def close(self) -> None:
+        """Stop background generation, waiting for a floor being built and dropping a queued one"""
+        self._pending_floor = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def change_floor(self, floor_number:int) -> None:
+        """Move the player to the given floor, keeping the one it leaves in the floor store.
+
+        Going down the player arrives at the entry location, going up at the down stairs.
+        """
+        previous_floor = self.current_floor
+        previous_map = getattr(self.engine, "map", None)
+
+        dungeon = self._get_floor(floor_number)
+        self.current_floor = floor_number
+        self.engine.map = dungeon
+
+        if floor_number < previous_floor:
+            x, y = dungeon.downstairs_location
+        else:
+            x, y = dungeon.entry_location
+        self.engine.player.place(*self._free_spot_near(dungeon, x, y), dungeon)
+
+        if previous_map is not None and previous_map is not dungeon:
+            self.floors.put(previous_floor, previous_map)
+
+        self.pregenerate_next_floor()
+
+    @staticmethod
+    def _free_spot_near(dungeon:GameMap, x:int, y:int) -> Tuple[int,int]:
+        """Return (x, y), or a walkable neighbour if a monster is standing there"""
+        if not dungeon.get_blocking_entity_at(x, y):
+            return x, y
+
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if (
+                dungeon.in_bounds(nx, ny)
+                and dungeon.walkable[nx, ny]
+                and not dungeon.get_blocking_entity_at(nx, ny)
+            ):
+                return nx, ny
+        return x, y
+
+    def descend(self) -> None:
+        self.change_floor(self.current_floor + 1)
+
+    def ascend(self) -> None:
+        self.change_floor(self.current_floor - 1)
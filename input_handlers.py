@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from typing import Callable, Optional, TYPE_CHECKING, Tuple, Union
+from typing import Callable, Hashable, Optional, TYPE_CHECKING, Tuple, Union
 
 import tcod.constants
 import tcod.event
@@ -77,6 +77,11 @@ class BaseEventHandler(tcod.event.EventDispatch[ActionOrHandler]):
     def on_render(self, console:tcod.console.Console) -> None:
         raise NotImplementedError()
     
+    @property
+    def render_revision(self) -> Hashable:
+        """Changes whenever on_render would draw something different"""
+        return None
+
     def ev_quit(self, event):
         raise SystemExit()
 
@@ -109,6 +114,7 @@ class EventHandler(BaseEventHandler):
         self.engine.handle_enemy_turns()
 
         self.engine.update_fov()
+        self.engine.mark_dirty()
         return True
 
     def ev_mousemotion(self, event):
@@ -118,6 +124,10 @@ class EventHandler(BaseEventHandler):
     def on_render(self, console:tcod.console.Console) -> None:
         self.engine.render(console=console)
 
+    @property
+    def render_revision(self) -> Hashable:
+        return self.engine.render_revision
+
 class MainGameEventHandler(EventHandler):
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
         action: Optional[Action] = None
@@ -127,7 +137,7 @@ class MainGameEventHandler(EventHandler):
 
         player = self.engine.player
 
-        if key == tcod.event.KeySym.PERIOD and mod & (
+        if key in (tcod.event.KeySym.PERIOD, tcod.event.KeySym.COMMA) and mod & (
             tcod.event.KMOD_LSHIFT | tcod.event.KMOD_RSHIFT
         ):
             return actions.TakeStairsAction(player)
@@ -193,6 +203,10 @@ class HistoryViewer(EventHandler):
 
         log_console.blit(console, 3,3)
 
+    @property
+    def render_revision(self) -> Hashable:
+        return super().render_revision, self.cursor
+
     def ev_keydown(self, event) -> Optional[MainGameEventHandler]:
         if event.sym in CURSOR_Y_KEYS:
             adjust = CURSOR_Y_KEYS[event.sym]
@@ -397,6 +411,10 @@ class AreaRangedAttackHandler(SelectIndexHandler):
             clear=False,
         )
 
+        #highlight the visible actors caught in the area
+        for actor in self.engine.map.actors_within(x, y, self.radius, visible_only=True):
+            console.tiles_rgb["fg"][actor.x, actor.y] = color.red
+
     def on_index_selected(self, x, y):
         return self.callback((x, y))
     
@@ -419,6 +437,10 @@ class PopupMessage(BaseEventHandler):
             alignment=tcod.constants.CENTER,
         )
 
+    @property
+    def render_revision(self) -> Hashable:
+        return self.parent.render_revision
+
     def ev_keydown(self, event) -> Optional[BaseEventHandler]:
         return self.parent
     
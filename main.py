@@ -13,6 +13,10 @@ def save_game(handler:input_handlers.BaseEventHandler, filename:str) -> None:
         handler.engine.save_as(filename=filename)
         print("Game saved.")
 
+def close_game(handler:input_handlers.BaseEventHandler) -> None:
+    if isinstance(handler, input_handlers.EventHandler):
+        handler.engine.world.close()
+
 def main() -> None:
     screen_width = 80
     screen_height = 50
@@ -31,14 +35,22 @@ def main() -> None:
         vsync=True,
     ) as context:
         root_console = tcod.console.Console(screen_width, screen_height, order="F")
+        #the handler and its render revision of the last presented frame
+        last_frame = None
         try:
             while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
+                frame = handler, handler.render_revision
+                if frame != last_frame:
+                    root_console.clear()
+                    handler.on_render(console=root_console)
+                    context.present(root_console)
+                    last_frame = frame
 
                 try:
                     for event in tcod.event.wait():
+                        if isinstance(event, tcod.event.WindowEvent):
+                            #the window may need to be redrawn even if nothing changed
+                            last_frame = None
                         context.convert_event(event=event)
                         handler = handler.handle_events(event)
                 except Exception:
@@ -55,6 +67,8 @@ def main() -> None:
         except BaseException:
             save_game(handler=handler, filename="savegame.sav")
             raise
+        finally:
+            close_game(handler)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,341 @@
+"""Map layout generators.
+
+A generator draws a Layout from a NumPy random generator: the walkable cells, the areas
+entities are spawned in, and where the player enters and leaves the floor.
+They only work on arrays, procgen.generate_dungeon turns a layout into a GameMap.
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+import numpy as np #type:ignore
+import tcod.path
+
+#share of cells starting as walls in the cave generator, and the number of smoothing steps
+CAVE_WALL_CHANCE = 0.45
+CAVE_ITERATIONS = 4
+
+#share of the map the drunkard's walk carves out, and the walkers sent out at once
+DRUNKARD_FLOOR_FRACTION = 0.35
+DRUNKARD_WALKERS = 16
+
+class Layout(NamedTuple):
+    #True for walkable cells
+    floor:np.ndarray
+    #(n, 4) array of x1, y1, x2, y2 rectangles entities spawn in, with the edges left out like rooms
+    areas:np.ndarray
+    entry_location:Tuple[int,int]
+    exit_location:Tuple[int,int]
+
+LayoutGenerator = Callable[[np.random.Generator, int, int, int, int, int], Layout]
+
+def rooms_layout(
+        rng:np.random.Generator,
+        map_width:int,
+        map_height:int,
+        max_rooms:int,
+        room_min_size:int,
+        room_max_size:int,
+) -> Layout:
+    """Rectangular rooms placed at random, each joined to the previous one by an L-shaped tunnel"""
+    #the first candidate is always kept, so one is enough for a room to enter in
+    if max_rooms < 1:
+        raise ValueError(f"max_rooms must be at least 1, got {max_rooms}")
+
+    candidates = sample_rooms(
+        max_rooms, room_min_size, room_max_size, map_width, map_height, rng
+    )
+    rooms = select_rooms(candidates)
+    return _join_rooms(rooms, rng, map_width, map_height)
+
+def bsp_layout(
+        rng:np.random.Generator,
+        map_width:int,
+        map_height:int,
+        max_rooms:int,
+        room_min_size:int,
+        room_max_size:int,
+) -> Layout:
+    """One room in every leaf of a binary space partition, joined in partition order.
+
+    The map is split until no leaf is more than twice as big as a room with its walls,
+    so the number of rooms follows the map size and `max_rooms` is not used.
+    """
+    leaves = bsp_leaves(rng, map_width, map_height, room_min_size + 2, 2 * (room_max_size + 2))
+    x, y, width, height = leaves.T
+
+    #rooms with their walls fit in their leaf, so rooms of different leaves never overlap
+    room_width = rng.integers(room_min_size, np.minimum(room_max_size, width - 1), endpoint=True)
+    room_height = rng.integers(room_min_size, np.minimum(room_max_size, height - 1), endpoint=True)
+    x1 = x + rng.integers(0, width - room_width - 1, endpoint=True)
+    y1 = y + rng.integers(0, height - room_height - 1, endpoint=True)
+
+    rooms = np.stack([x1, y1, x1 + room_width, y1 + room_height], axis=1)
+    return _join_rooms(rooms, rng, map_width, map_height)
+
+def bsp_leaves(
+        rng:np.random.Generator,
+        map_width:int,
+        map_height:int,
+        min_size:int,
+        max_size:int,
+) -> np.ndarray:
+    """Split the map in two along its longer side until the parts are at most `max_size` wide and high.
+
+    Returns the leaves as an (n, 4) array of x, y, width, height rows, in depth first order
+    so consecutive leaves are close to each other.
+    """
+    leaves:List[Tuple[int,int,int,int]] = []
+    stack = [(0, 0, map_width, map_height)]
+
+    while stack:
+        x, y, width, height = stack.pop()
+        split_x = width > max_size and width >= 2 * min_size
+        split_y = height > max_size and height >= 2 * min_size
+
+        if split_x and (not split_y or width >= height):
+            cut = int(rng.integers(min_size, width - min_size, endpoint=True))
+            stack += [(x + cut, y, width - cut, height), (x, y, cut, height)]
+        elif split_y:
+            cut = int(rng.integers(min_size, height - min_size, endpoint=True))
+            stack += [(x, y + cut, width, height - cut), (x, y, width, cut)]
+        else:
+            leaves.append((x, y, width, height))
+
+    return np.array(leaves, dtype=np.int64).reshape(-1, 4)
+
+def cave_layout(
+        rng:np.random.Generator,
+        map_width:int,
+        map_height:int,
+        max_rooms:int,
+        room_min_size:int,
+        room_max_size:int,
+) -> Layout:
+    """Caves grown by a cellular automaton, only the largest connected cave is kept.
+
+    A cell becomes a wall when at least 5 of the 9 cells around it, itself included, are walls.
+    """
+    walls = rng.random((map_width, map_height)) < CAVE_WALL_CHANCE
+    _fill_border(walls)
+
+    for _ in range(CAVE_ITERATIONS):
+        padded = np.pad(walls, 1, constant_values=True)
+        neighbours = np.zeros((map_width, map_height), dtype=np.uint8)
+        for dx in range(3):
+            for dy in range(3):
+                neighbours += padded[dx:dx + map_width, dy:dy + map_height]
+        walls = neighbours >= 5
+        _fill_border(walls)
+
+    return _open_layout(~walls, rng, room_max_size)
+
+def drunkard_layout(
+        rng:np.random.Generator,
+        map_width:int,
+        map_height:int,
+        max_rooms:int,
+        room_min_size:int,
+        room_max_size:int,
+) -> Layout:
+    """Random walks carving out the map from its center until DRUNKARD_FLOOR_FRACTION of it is floor.
+
+    Walkers are sent out in batches, each one starting on a cell carved by an earlier batch,
+    so the floor is always connected. A walker bounces off the map edges.
+    """
+    floor = np.zeros((map_width, map_height), dtype=bool)
+    floor[map_width // 2, map_height // 2] = True
+
+    target = int(map_width * map_height * DRUNKARD_FLOOR_FRACTION)
+    steps = 2 * (map_width + map_height)
+    directions = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+    carved = 1
+    while carved < target:
+        starts = np.argwhere(floor)
+        starts = starts[rng.integers(len(starts), size=DRUNKARD_WALKERS)]
+
+        moves = directions[rng.integers(4, size=(DRUNKARD_WALKERS, steps))]
+        xs = _bounce(starts[:, 0, None] + moves[:, :, 0].cumsum(axis=1), 1, map_width - 2)
+        ys = _bounce(starts[:, 1, None] + moves[:, :, 1].cumsum(axis=1), 1, map_height - 2)
+
+        floor[xs, ys] = True
+        carved = np.count_nonzero(floor)
+
+    return _open_layout(floor, rng, room_max_size)
+
+#layout generators by the name GameWorld selects them with
+GENERATORS:Dict[str, LayoutGenerator] = {
+    "rooms": rooms_layout,
+    "bsp": bsp_layout,
+    "caves": cave_layout,
+    "drunkard": drunkard_layout,
+}
+
+def distances_from(floor:np.ndarray, x:int, y:int) -> np.ndarray:
+    """Return the walking distance from (x, y) to every floor cell.
+
+    Cells that can't be reached are left at the int32 maximum.
+    """
+    distance = tcod.path.maxarray(floor.shape, dtype=np.int32, order="F")
+    distance[x, y] = 0
+    tcod.path.dijkstra2d(distance, floor.astype(np.int8), 1, 1, out=distance)
+    return distance
+
+def largest_region(floor:np.ndarray, rng:np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the largest connected part of `floor` and the distances from a random cell in it.
+
+    Regions are flood filled from random cells not reached so far until no remaining part
+    of the floor could be larger than the largest region found.
+    Raises ValueError if `floor` has no walkable cell.
+    """
+    if not floor.any():
+        raise ValueError("The layout has no floor cells, try other generator parameters")
+
+    remaining = floor.copy()
+    best_region = np.zeros_like(floor)
+    best_distance = None
+    best_size = 0
+
+    while np.count_nonzero(remaining) > best_size:
+        cells = np.argwhere(remaining)
+        x, y = cells[rng.integers(len(cells))]
+
+        distance = distances_from(floor, x, y)
+        region = distance != np.iinfo(np.int32).max
+        size = np.count_nonzero(region)
+
+        if size > best_size:
+            best_region, best_distance, best_size = region, distance, size
+        remaining &= ~region
+
+    return best_region, best_distance
+
+def sample_rooms(
+        count:int,
+        room_min_size:int,
+        room_max_size:int,
+        map_width:int,
+        map_height:int,
+        rng:np.random.Generator,
+) -> np.ndarray:
+    """Return `count` random candidate rooms as a (count, 4) array of x1, y1, x2, y2 rows"""
+    width = rng.integers(room_min_size, room_max_size, size=count, endpoint=True)
+    height = rng.integers(room_min_size, room_max_size, size=count, endpoint=True)
+
+    x = rng.integers(0, map_width - width - 1, endpoint=True)
+    y = rng.integers(0, map_height - height - 1, endpoint=True)
+
+    return np.stack([x, y, x + width, y + height], axis=1)
+
+def select_rooms(candidates:np.ndarray) -> np.ndarray:
+    """Return the candidates that don't intersect any earlier candidate that was kept.
+
+    Rooms intersect when they overlap or share an edge, every pair is tested at once.
+    """
+    x1, y1, x2, y2 = candidates.T
+    overlaps = (
+        (x1[:, None] <= x2[None, :])
+        & (x2[:, None] >= x1[None, :])
+        & (y1[:, None] <= y2[None, :])
+        & (y2[:, None] >= y1[None, :])
+    )
+
+    kept = np.zeros(len(candidates), dtype=bool)
+    for i in range(len(candidates)):
+        kept[i] = not (overlaps[i, :i] & kept[:i]).any()
+
+    return candidates[kept]
+
+def carve_rooms(rooms:np.ndarray, map_width:int, map_height:int) -> np.ndarray:
+    """Return a mask of the inner area of every room, see procgen.RectangularRoom.inner"""
+    #2D difference array, +1 at the top left corner of each area and -1 just past its edges
+    corners = np.zeros((map_width + 1, map_height + 1), dtype=np.int32)
+    x1, y1, x2, y2 = rooms.T + np.array([[1], [1], [0], [0]])
+
+    np.add.at(corners, (x1, y1), 1)
+    np.add.at(corners, (x2, y1), -1)
+    np.add.at(corners, (x1, y2), -1)
+    np.add.at(corners, (x2, y2), 1)
+
+    covered = corners.cumsum(axis=0).cumsum(axis=1)[:map_width, :map_height] > 0
+    return np.asfortranarray(covered)
+
+def carve_tunnels(
+        starts:np.ndarray,
+        ends:np.ndarray,
+        horizontal_first:np.ndarray,
+        map_width:int,
+        map_height:int,
+) -> np.ndarray:
+    """Return a mask of L-shaped tunnels between each start and end point.
+
+    Each tunnel is a horizontal and a vertical run that meet at a corner,
+    the horizontal run comes first where `horizontal_first` is True.
+    """
+    (sx, sy), (ex, ey) = starts.T, ends.T
+
+    #the horizontal run is on the start row when it comes first, otherwise on the end row
+    row = np.where(horizontal_first, sy, ey)
+    #and the vertical run on the end column when it comes second
+    column = np.where(horizontal_first, ex, sx)
+
+    rows = np.zeros((map_width + 1, map_height), dtype=np.int32)
+    np.add.at(rows, (np.minimum(sx, ex), row), 1)
+    np.add.at(rows, (np.maximum(sx, ex) + 1, row), -1)
+
+    columns = np.zeros((map_width, map_height + 1), dtype=np.int32)
+    np.add.at(columns, (column, np.minimum(sy, ey)), 1)
+    np.add.at(columns, (column, np.maximum(sy, ey) + 1), -1)
+
+    tunnels = (rows.cumsum(axis=0)[:map_width] > 0) | (columns.cumsum(axis=1)[:, :map_height] > 0)
+    return np.asfortranarray(tunnels)
+
+def _join_rooms(
+        rooms:np.ndarray, rng:np.random.Generator, map_width:int, map_height:int
+) -> Layout:
+    """Carve rooms joined in order by tunnels, entering in the first room and leaving from the last"""
+    centers = (rooms[:, :2] + rooms[:, 2:]) // 2
+    horizontal_first = rng.random(len(rooms) - 1) < 0.5
+
+    floor = carve_rooms(rooms, map_width, map_height)
+    floor |= carve_tunnels(centers[:-1], centers[1:], horizontal_first, map_width, map_height)
+
+    entry_location = tuple(centers[0].tolist())
+    #a single room has no down stairs to reach, keep them out of the way
+    exit_location = tuple(centers[-1].tolist()) if len(rooms) > 1 else (0,0)
+    return Layout(floor, rooms, entry_location, exit_location)
+
+def _open_layout(floor:np.ndarray, rng:np.random.Generator, room_max_size:int) -> Layout:
+    """Layout for maps without rooms.
+
+    Only the largest connected region is kept. The player enters at a random cell of it and
+    leaves from the cell farthest from there. Entities spawn in square blocks about as
+    common as rooms.
+    """
+    region, distance = largest_region(floor, rng)
+    entry_location = tuple(np.argwhere(distance == 0)[0].tolist())
+    exit_x, exit_y = np.unravel_index(np.argmax(np.where(region, distance, -1)), distance.shape)
+
+    size = 2 * room_max_size
+    width, height = floor.shape
+    bx, by = np.meshgrid(np.arange(0, width, size), np.arange(0, height, size), indexing="ij")
+    bx, by = bx.ravel(), by.ravel()
+
+    areas = np.stack(
+        [bx - 1, by - 1, np.minimum(bx + size, width), np.minimum(by + size, height)], axis=1
+    )
+    return Layout(np.asfortranarray(region), areas, entry_location, (int(exit_x), int(exit_y)))
+
+def _fill_border(walls:np.ndarray) -> None:
+    walls[[0, -1], :] = True
+    walls[:, [0, -1]] = True
+
+def _bounce(position:np.ndarray, low:int, high:int) -> np.ndarray:
+    """Fold positions back into [low, high] as if they bounced off both ends.
+
+    Positions one step apart stay at most one step apart, so a walk stays connected.
+    """
+    span = high - low
+    folded = np.mod(position - low, 2 * span)
+    return low + np.where(folded <= span, folded, 2 * span - folded)
@@ -5,8 +5,11 @@ import textwrap
 import tcod
 
 import color
+from slotted import Slotted
+
+class Message(Slotted):
+    __slots__ = ("plain_text", "fg", "count")
 
-class Message:
     def __init__(self, text:str, fg:Tuple[int,int,int]):
         self.plain_text = text
         self.fg = fg
@@ -21,10 +24,19 @@ class Message:
 class MessageLog:
     def __init__(self):
         self.messages:List[Message] = []
+        #bumped on every new or stacked message
+        self.revision = 0
+
+    def __setstate__(self, state:dict) -> None:
+        #saves from before render revisions
+        state.setdefault("revision", 0)
+        self.__dict__.update(state)
 
     def add_message(
             self, text:str, fg:Tuple[int,int,int] = color.white, *, stack:bool = True,
     ) -> None:
+        self.revision += 1
+
         if stack and self.messages and text == self.messages[-1].plain_text:
             self.messages[-1].count += 1
         else:
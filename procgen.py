@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from contextlib import contextmanager
+import itertools
+import json
 import random
-from typing import Dict, Iterator, List, Tuple, TYPE_CHECKING
+import threading
+import time
+from typing import (
+    Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar, TYPE_CHECKING
+)
 
-import tcod
+import numpy as np #type:ignore
 
 from game_map import GameMap
+from map_generators import GENERATORS
 import tile_types
 import entity_factories
 
@@ -38,6 +47,15 @@ enemy_chances:Dict[int,List[Tuple[Entity,int]]] = {
     7:[(entity_factories.troll, 60)],
 }
 
+#number of (chance table, floor) results kept, see get_spawn_table
+SPAWN_TABLE_CACHE_SIZE = 256
+
+T = TypeVar("T")
+
+_spawn_tables:OrderedDict[Tuple[int,int], Tuple[Any, Any]] = OrderedDict()
+#floors are also generated in a background thread
+_spawn_tables_lock = threading.Lock()
+
 class RectangularRoom:
     def __init__(self, x:int, y:int, width:int, height:int):
         self.x1 = x
@@ -45,26 +63,10 @@ class RectangularRoom:
         self.y1 = y
         self.y2 = y + height
 
-    @property
-    def center(self) -> Tuple[int,int]:
-        center_x = int((self.x1 + self.x2) / 2)
-        center_y = int((self.y1 + self.y2) / 2)
-
-        return center_x, center_y
-
     @property
     def inner(self) -> Tuple[slice,slice]:
         """Return the inner area of this room as a 2D array index"""
         return slice(self.x1 + 1, self.x2), slice(self.y1 + 1, self.y2)
-    
-    def intersects(self, other:RectangularRoom) -> bool:
-        """Return True if this room overlaps with another RectangularRool"""
-        return (
-            self.x1 <= other.x2
-            and self.x2 >= other.x1
-            and self.y1 <= other.y2
-            and self.y2 >= other.y1
-        )
 
 def generate_dungeon(
         max_rooms:int,
@@ -73,115 +75,181 @@ def generate_dungeon(
         map_width:int, 
         map_height:int,
         engine:Engine,
+        floor_number:int,
+        layout_rng:random.Random,
+        spawn_rng:random.Random,
+        timings:Optional[Dict[str,float]] = None,
+        generator:str = "rooms",
         ) -> GameMap:
-    """Generate a new dungeon map"""
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
-
-    rooms:List[RectangularRoom] = []
-
-    center_of_last_room = (0,0)
-
-    for r in range(max_rooms): 
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
-
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
-
-        new_room = RectangularRoom(x, y, room_width, room_height)
-
-        if any(new_room.intersects(other_room) for other_room in rooms):
-            continue
-
-        dungeon.tiles[new_room.inner] = tile_types.floor
+    """Generate a new dungeon map with the named layout generator from map_generators.GENERATORS
+
+    The layout is drawn from `layout_rng` and entities from `spawn_rng`,
+    so changing what spawns doesn't change the layout.
+    The player is not placed on the map, it should be placed at `entry_location`.
+    This only reads the engine, so it's safe to run in a worker thread with its own generators.
+    Seconds spent in each stage are added to `timings` when it's given.
+    """
+    dungeon = GameMap(engine, map_width, map_height)
+
+    with timed(timings, "layout"):
+        #numpy generator so the layout can be drawn in bulk, seeded from layout_rng to stay reproducible
+        rng = np.random.default_rng(layout_rng.getrandbits(128))
+        layout = GENERATORS[generator](
+            rng, map_width, map_height, max_rooms, room_min_size, room_max_size
+        )
 
-        if len(rooms) == 0:
-            player.place(*new_room.center, dungeon)
-        else:
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+    with timed(timings, "carve"):
+        dungeon.set_tiles(layout.floor, tile_types.floor)
 
-            center_of_last_room = new_room.center
+    dungeon.entry_location = layout.entry_location
 
-        place_entities(new_room, dungeon, floor_number=engine.world.current_floor)
+    with timed(timings, "spawn"):
+        for x1, y1, x2, y2 in layout.areas.tolist():
+            room = RectangularRoom(x1, y1, x2 - x1, y2 - y1)
+            place_entities(room, dungeon, floor_number, spawn_rng)
 
-        dungeon.tiles[center_of_last_room] = tile_types.down_stairs
-        dungeon.downstairs_location = center_of_last_room
+    dungeon.set_tiles(layout.exit_location, tile_types.down_stairs)
+    dungeon.downstairs_location = layout.exit_location
 
-        rooms.append(new_room)
+    if floor_number > 1:
+        dungeon.set_tiles(dungeon.entry_location, tile_types.up_stairs)
+        dungeon.upstairs_location = dungeon.entry_location
     
     return dungeon
 
-def tunnel_between(
-        start:Tuple[int,int], end:Tuple[int,int]
-) -> Iterator[Tuple[int,int]]:
-    """Return an L-shaped tunnel between two points"""
-    x1, y1 = start
-    x2, y2 = end
-
-    if random.random() < 0.5:
-        corner_x, corner_y = x2, y1
-    else:
-        corner_x, corner_y = x1, y2
+@contextmanager
+def timed(timings:Optional[Dict[str,float]], stage:str) -> Iterator[None]:
+    """Add the seconds spent in the block to `timings[stage]`, does nothing if timings is None"""
+    if timings is None:
+        yield
+        return
 
-    for x, y in tcod.los.bresenham((x1, y1), (corner_x, corner_y)).tolist():
-        yield x, y
-        
-    for x, y in tcod.los.bresenham((corner_x, corner_y), (x2, y2)).tolist():
-        yield x, y
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
 
 def place_entities(
-        room:RectangularRoom, dungeon:GameMap, floor_number:int,
+        room:RectangularRoom,
+        dungeon:GameMap,
+        floor_number:int,
+        rng:random.Random,
         ) -> None:
-    number_of_monsters = random.randint(0, get_max_value_for_floor(max_monsters_by_floor, floor_number))
-    number_of_items = random.randint(0, get_max_value_for_floor(max_items_by_floor, floor_number))
+    number_of_monsters = rng.randint(0, get_max_value_for_floor(max_monsters_by_floor, floor_number))
+    number_of_items = rng.randint(0, get_max_value_for_floor(max_items_by_floor, floor_number))
 
     monsters:List[Entity] = get_entities_at_random(
-        enemy_chances, number_of_monsters, floor_number
+        enemy_chances, number_of_monsters, floor_number, rng
     )
 
     items:List[Entity] = get_entities_at_random(
-        item_chances, number_of_items, floor_number
+        item_chances, number_of_items, floor_number, rng
     )
 
-    for entity in monsters + items:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+    spawns = monsters + items
+    if not spawns:
+        return
 
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            entity.spawn(dungeon, x, y)
+    free = dungeon.walkable[room.inner] & ~dungeon.get_occupied(room.inner)
+
+    #the player will be placed at the entry location
+    entry_x, entry_y = dungeon.entry_location
+    if room.x1 < entry_x < room.x2 and room.y1 < entry_y < room.y2:
+        free[entry_x - room.x1 - 1, entry_y - room.y1 - 1] = False
+
+    free_cells = np.argwhere(free) + (room.x1 + 1, room.y1 + 1)
+
+    #distinct cells, so every entity gets placed unless the room is full
+    picks = rng.sample(range(len(free_cells)), min(len(spawns), len(free_cells)))
+
+    for entity, (x, y) in zip(spawns, free_cells[picks].tolist()):
+        entity.spawn(dungeon, x, y)
 
 def get_max_value_for_floor(weighted_chances:List[Tuple[int,int]], floor:int) -> int:
+    return _memoized(weighted_chances, floor, _build_max_value)
+
+def _build_max_value(weighted_chances:List[Tuple[int,int]], floor:int) -> int:
     current_value = 0
-    for floor_minimum, value in weighted_chances:
+    for floor_minimum, value in sorted(weighted_chances, key=lambda x: x[0]):
         if floor_minimum > floor:
             break
         else:
             current_value = value
     return current_value
 
-def get_entities_at_random(
-        weighted_chances:Dict[int,List[Tuple[Entity,int]]],
-        number_of_entities:int,
-        floor:int,
-) -> List[Entity]:
+class SpawnTable(NamedTuple):
+    """The entities that can spawn on a floor with their cumulative weights"""
+    entities:List[Entity]
+    cum_weights:List[int]
+
+def get_spawn_table(weighted_chances:Dict[int,List[Tuple[Entity,int]]], floor:int) -> SpawnTable:
+    """Return the spawn table of a floor, built once per table and floor"""
+    return _memoized(weighted_chances, floor, _build_spawn_table)
+
+def _build_spawn_table(weighted_chances:Dict[int,List[Tuple[Entity,int]]], floor:int) -> SpawnTable:
     entity_chances = {}
 
-    for key, values in weighted_chances.items():
+    for key in sorted(weighted_chances):
         if key > floor:
             break
         else:
-            for value in values:
-                entity = value[0]
-                weighted_chance = value[1]
+            for entity, weighted_chance in weighted_chances[key]:
                 entity_chances[entity] = weighted_chance
 
-    entities = list(entity_chances.keys())
-    entity_chances_values = list(entity_chances.values())
+    return SpawnTable(list(entity_chances), list(itertools.accumulate(entity_chances.values())))
 
-    chosen_entities = random.choices(
-        entities, weights=entity_chances_values, k=number_of_entities
-    )
+def _memoized(table:Any, floor:int, build:Callable[[Any, int], T]) -> T:
+    """Return build(table, floor), remembering the results for recently used tables and floors.
+
+    Chance tables are treated as constants, call clear_spawn_tables after changing one.
+    """
+    key = id(table), floor
+
+    with _spawn_tables_lock:
+        cached = _spawn_tables.get(key)
+        #the table itself is kept so its id can't be reused by another one
+        if cached is not None and cached[0] is table:
+            _spawn_tables.move_to_end(key)
+            return cached[1]
+
+    value = build(table, floor)
+
+    with _spawn_tables_lock:
+        _spawn_tables[key] = table, value
+        if len(_spawn_tables) > SPAWN_TABLE_CACHE_SIZE:
+            _spawn_tables.popitem(last=False)
+
+    return value
+
+def clear_spawn_tables() -> None:
+    with _spawn_tables_lock:
+        _spawn_tables.clear()
+
+def get_entities_at_random(
+        weighted_chances:Dict[int,List[Tuple[Entity,int]]],
+        number_of_entities:int,
+        floor:int,
+        rng:random.Random,
+) -> List[Entity]:
+    table = get_spawn_table(weighted_chances, floor)
+    if not table.entities:
+        return []
+
+    #picks are a binary search in the cumulative weights, and the same picks weights= would give
+    return rng.choices(table.entities, cum_weights=table.cum_weights, k=number_of_entities)
+
+def load_spawn_chances(filename:str) -> Dict[int,List[Tuple[Entity,int]]]:
+    """Load a chance table like enemy_chances from a JSON file.
+
+    The file maps floor numbers to lists of [entity_factories name, weight] pairs:
+
+        {"0": [["orc", 80]], "3": [["troll", 15]]}
+    """
+    with open(filename) as f:
+        data = json.load(f)
 
-    return chosen_entities
\ No newline at end of file
+    return {
+        int(floor): [(getattr(entity_factories, name), int(weight)) for name, weight in values]
+        for floor, values in sorted(data.items(), key=lambda x: int(x[0]))
+    }
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import random
+from typing import Dict, Optional
+
+#names of the independent streams
+LAYOUT = "layout"
+SPAWNS = "spawns"
+AI = "ai"
+
+class RandomStreams:
+    """Named random number generators all derived from a single seed.
+
+    Every stream is seeded from the game seed and its name, so drawing from one stream never
+    shifts the numbers of another. Streams for a floor are also seeded with the floor number,
+    the same floor comes out the same whatever order floors are generated in and from any thread.
+    """
+    def __init__(self, seed:Optional[int] = None):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self._streams:Dict[str, random.Random] = {}
+
+    def stream(self, name:str) -> random.Random:
+        """Return the game wide stream with the given name, its state is kept in save files"""
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = random.Random(f"{self.seed}/{name}")
+            self._streams[name] = stream
+        return stream
+
+    def for_floor(self, floor_number:int, name:str) -> random.Random:
+        """Return a new generator for one use of the named stream on the given floor"""
+        return random.Random(f"{self.seed}/{floor_number}/{name}")
+
+    @property
+    def ai(self) -> random.Random:
+        return self.stream(AI)
@@ -14,7 +14,7 @@ def get_names_at(x:int, y:int, map:GameMap) -> str:
         return ""
     
     names = ", ".join(
-        entity.name for entity in map.entities if entity.x == x and entity.y == y
+        entity.name for entity in map.get_entities_at(x, y)
     )
 
     return names.capitalize()
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import copy
 import lzma
 import pickle
 import traceback
@@ -25,7 +24,7 @@ def new_game() -> Engine:
     room_min_size = 6
     max_rooms = 30
 
-    player = copy.deepcopy(entity_factories.player)
+    player = entity_factories.player.clone()
 
     engine = Engine(player)
 
@@ -38,13 +37,13 @@ def new_game() -> Engine:
         map_height=map_height,
         )
     
-    engine.world.generate_floor()
+    engine.world.descend()
     engine.update_fov()
 
     engine.message_log.add_message("Hello and welcome, adventurer, to yet another dungeon!", color.welcome_text)
 
-    dagger = copy.deepcopy(entity_factories.dagger)
-    leather_armor = copy.deepcopy(entity_factories.leather_armor)
+    dagger = entity_factories.dagger.clone()
+    leather_armor = entity_factories.leather_armor.clone()
 
     dagger.parent = player.inventory
     leather_armor.parent = player.inventory
@@ -113,4 +112,5 @@ def load_game(filename:str) -> Engine:
     with open(filename, "rb") as f:
         engine = pickle.loads(lzma.decompress(f.read()))
     assert isinstance(engine, Engine)
+    engine.world.pregenerate_next_floor()
     return engine
\ No newline at end of file
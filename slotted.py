@@ -0,0 +1,51 @@
+from typing import Any, Dict, Tuple, Type
+
+#all slot names of a class including inherited ones, filled in on first use
+_slot_names:Dict[type, Tuple[str, ...]] = {}
+
+def slot_names(cls:Type["Slotted"]) -> Tuple[str, ...]:
+    names = _slot_names.get(cls)
+
+    if names is None:
+        names = tuple(
+            name
+            for klass in reversed(cls.__mro__)
+            for name in klass.__dict__.get("__slots__", ())
+        )
+        _slot_names[cls] = names
+
+    return names
+
+def state_to_dict(state:Any) -> Dict[str, Any]:
+    """Merge pickled (__dict__ state, __slots__ state) pairs into a single dict"""
+    if isinstance(state, tuple):
+        #either part may be None
+        dict_state, slots_state = state
+        return {**(dict_state or {}), **(slots_state or {})}
+    return dict(state)
+
+class Slotted:
+    """Base class for objects storing their attributes in __slots__ instead of a __dict__.
+
+    Subclasses list their own attributes in `__slots__`.
+    Unpickling accepts the state of both slotted objects and older __dict__ based
+    versions of the same class, so saves made before the switch still load.
+    """
+    __slots__ = ()
+
+    def __setstate__(self, state:Any) -> None:
+        for name, value in state_to_dict(state).items():
+            setattr(self, name, value)
+
+    def __copy__(self):
+        cls = type(self)
+        clone = cls.__new__(cls)
+
+        for name in slot_names(cls):
+            try:
+                setattr(clone, name, getattr(self, name))
+            except AttributeError:
+                #unset slot, e.g. the parent of a prototype
+                pass
+
+        return clone
@@ -0,0 +1,36 @@
+import pytest
+
+import actions
+from engine import Engine
+import entity_factories
+from exceptions import Impossible
+from game_map import GameMap
+import tile_types
+
+def make_engine() -> Engine:
+    engine = Engine(entity_factories.player.clone(), seed=0)
+    engine.map = GameMap(engine, 20, 20)
+    engine.map.set_tiles((slice(1, 19), slice(1, 19)), tile_types.floor)
+    engine.map.visible[:] = True
+    engine.player.place(5, 5, engine.map)
+    return engine
+
+def read_lightning_scroll(engine:Engine) -> None:
+    scroll = entity_factories.lightning_scroll.spawn(engine.map, engine.player.x, engine.player.y)
+    actions.ItemAction(engine.player, scroll).perform()
+
+def test_lightning_reaches_diagonal_targets_just_past_max_range():
+    engine = make_engine()
+    #sqrt(26), over max_range 5 but under max_range + 1
+    orc = entity_factories.orc.spawn(engine.map, 10, 6)
+    hp = orc.fighter.hp
+
+    read_lightning_scroll(engine)
+    assert orc.fighter.hp < hp
+
+def test_lightning_does_not_reach_max_range_plus_one():
+    engine = make_engine()
+    entity_factories.orc.spawn(engine.map, 11, 5)
+
+    with pytest.raises(Impossible):
+        read_lightning_scroll(engine)
@@ -0,0 +1,42 @@
+import lzma
+import pickle
+import random
+
+from game_map import PackedMask
+import setup_game
+
+def reload(engine):
+    return pickle.loads(lzma.decompress(lzma.compress(pickle.dumps(engine))))
+
+def test_stored_floors_stay_compacted_after_loading():
+    random.seed(0)
+    engine = setup_game.new_game()
+    for _ in range(4):
+        engine.world.descend()
+
+    engine = reload(engine)
+    floors = engine.world.floors
+
+    assert len(floors._floors) == 4
+    for floor_number, game_map in floors._floors.items():
+        assert isinstance(game_map.visible, PackedMask)
+        assert floors._sizes[floor_number] == game_map.nbytes
+    assert floors.memory_used == sum(game_map.nbytes for game_map in floors._floors.values())
+
+    assert not isinstance(engine.map.visible, PackedMask)
+    engine.update_fov()
+
+def test_returning_to_a_floor_expands_it():
+    random.seed(0)
+    engine = setup_game.new_game()
+    engine.world.floors.memory_budget = 0
+    engine.world.descend()
+    engine.world.descend()
+
+    engine = reload(engine)
+    engine.world.ascend()
+    engine.world.ascend()
+
+    assert engine.world.current_floor == 1
+    assert not isinstance(engine.map.visible, PackedMask)
+    engine.update_fov()
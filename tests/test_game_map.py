@@ -0,0 +1,72 @@
+import pickle
+import random
+
+import numpy as np
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap, PackedMask
+import setup_game
+import tile_types
+
+def test_compact_drops_derived_grids_and_expand_rebuilds_them():
+    random.seed(0)
+    engine = setup_game.new_game()
+    game_map = engine.map
+    game_map.update_flow_field(engine.player.x, engine.player.y)
+
+    blocking = game_map.blocking.copy()
+    path_cost = game_map.path_cost.copy()
+    render_layers = {order: layer.copy() for order, layer in game_map.render_layers.items()}
+
+    game_map.compact()
+    assert game_map.flow_field is None
+    assert game_map.path_cost is None and game_map.blocking is None
+
+    game_map.expand()
+    assert np.array_equal(game_map.blocking, blocking)
+    assert np.array_equal(game_map.path_cost, path_cost)
+    for order, layer in render_layers.items():
+        assert np.array_equal(game_map.render_layers[order], layer)
+
+def test_flow_field_follows_tile_changes():
+    random.seed(0)
+    engine = setup_game.new_game()
+    game_map = engine.map
+    x, y = engine.player.x, engine.player.y
+    game_map.update_flow_field(x, y)
+    assert game_map.flow_field[x, y] == 0
+
+    #walling in the target leaves every other cell unreachable
+    game_map.set_tiles((slice(x - 1, x + 2), slice(y - 1, y + 2)), tile_types.wall)
+    game_map.set_tiles((x, y), tile_types.floor)
+    game_map.update_flow_field(x, y)
+
+    unreachable = np.iinfo(np.int32).max
+    assert (game_map.flow_field[game_map.walkable] == unreachable).sum() == game_map.walkable.sum() - 1
+
+def test_packed_masks_round_trip_for_any_size():
+    rng = np.random.default_rng(0)
+    for shape in ((1, 1), (3, 5), (7, 9), (8, 8), (79, 43), (81, 45)):
+        mask = np.asfortranarray(rng.random(shape) < 0.5)
+        mask[-1, -1] = True
+
+        packed = pickle.loads(pickle.dumps(PackedMask(mask)))
+        unpacked = packed.unpack()
+        assert unpacked.shape == shape and unpacked.dtype == bool
+        assert unpacked.flags.f_contiguous
+        assert np.array_equal(unpacked, mask)
+
+def test_odd_sized_maps_keep_explored_cells_when_saved():
+    engine = Engine(entity_factories.player.clone(), seed=0)
+    game_map = engine.map = GameMap(engine, 37, 21)
+    game_map.explored[::3, ::2] = True
+    game_map.explored[-1, -1] = True
+    game_map.visible[5:9, 3:7] = True
+    explored, visible = game_map.explored.copy(), game_map.visible.copy()
+
+    #loading the engine expands its map
+    game_map = pickle.loads(pickle.dumps(engine)).map
+
+    assert np.array_equal(game_map.explored, explored)
+    assert np.array_equal(game_map.visible, visible)
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+import setup_game
+
+def test_background_generation_errors_are_raised():
+    random.seed(0)
+    engine = setup_game.new_game()
+    world = engine.world
+    world.close()
+
+    calls = []
+    def build_floor(floor_number, timings=None):
+        calls.append(floor_number)
+        raise RuntimeError("generator bug")
+
+    world.build_floor = build_floor
+    world.pregenerate_next_floor()
+
+    with pytest.raises(RuntimeError, match="generator bug"):
+        world.descend()
+    #the failed floor is not built a second time on the main thread
+    assert calls == [2]
+    world.close()
+
+def test_close_stops_background_generation():
+    random.seed(0)
+    engine = setup_game.new_game()
+    world = engine.world
+    executor = world._executor
+    assert world._pending_floor is not None
+
+    world.close()
+    assert world._pending_floor is None and world._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+    #closing doesn't stop the game, the next floor is simply built when needed
+    world.descend()
+    assert world.current_floor == 2
+    world.close()
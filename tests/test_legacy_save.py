@@ -0,0 +1,72 @@
+"""Loading a save made by the game before the spatial index, slots and the floor store.
+
+data/baseline.sav was saved by that version on floor 2, after a few turns, with a
+corpse, a confused orc and a health potion on the map.
+"""
+import lzma
+import os
+import pickle
+
+import pytest
+import tcod
+
+import actions
+from components.ai import ConfusedEnemy
+from entity import Actor, Item
+import setup_game
+import tile_types
+
+SAVE = os.path.join(os.path.dirname(__file__), "data", "baseline.sav")
+
+@pytest.fixture
+def engine():
+    return setup_game.load_game(SAVE)
+
+def test_map_is_upgraded(engine):
+    game_map = engine.map
+    player = engine.player
+
+    assert engine.world.current_floor == 2
+    assert game_map.tiles.dtype == tile_types.tile_index_dt
+    assert game_map.tiles.max() < len(tile_types.tile_table())
+    assert game_map.walkable[player.x, player.y]
+    assert game_map.tiles[game_map.downstairs_location] == tile_types.down_stairs
+
+    for entity in game_map.entities:
+        assert entity in game_map.get_entities_at(entity.x, entity.y)
+
+    assert game_map.get_actor_at(player.x, player.y) is player
+    assert player.fighter.store is game_map.actor_store
+
+def test_actors_are_scheduled(engine):
+    game_map = engine.map
+    monsters = [
+        entity for entity in game_map.entities
+        if isinstance(entity, Actor) and entity is not engine.player
+    ]
+
+    corpses = [monster for monster in monsters if not monster.is_alive]
+    assert corpses and not any(corpse in game_map.live_actors for corpse in corpses)
+
+    living = [monster for monster in monsters if monster.is_alive]
+    assert all(monster in game_map.scheduler for monster in living)
+    assert any(isinstance(monster.ai, ConfusedEnemy) for monster in living)
+
+    assert any(isinstance(entity, Item) for entity in game_map.entities)
+
+def test_game_continues(engine):
+    console = tcod.console.Console(80, 50, order="F")
+    engine.update_fov()
+    engine.render(console)
+
+    engine.player.fighter.hp = engine.player.fighter.max_hp
+    for _ in range(3):
+        actions.WaitAction(engine.player).perform()
+        engine.handle_enemy_turns()
+        engine.update_fov()
+    engine.render(console)
+
+    reloaded = pickle.loads(lzma.decompress(lzma.compress(pickle.dumps(engine))))
+    assert len(reloaded.map.entities) == len(engine.map.entities)
+    reloaded.update_fov()
+    reloaded.render(console)
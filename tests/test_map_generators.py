@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from map_generators import GENERATORS, distances_from, largest_region, rooms_layout
+
+SIZES = ((80, 43), (45, 31), (120, 90))
+SEEDS = (0, 1, 2)
+
+@pytest.mark.parametrize("name", sorted(GENERATORS))
+@pytest.mark.parametrize("width,height", SIZES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_entry_and_exit_are_connected(name, width, height, seed):
+    rng = np.random.default_rng(seed)
+    layout = GENERATORS[name](rng, width, height, 30, 6, 10)
+
+    assert layout.floor.shape == (width, height)
+    assert layout.floor[layout.entry_location]
+    assert layout.floor[layout.exit_location]
+    assert layout.entry_location != layout.exit_location
+
+    distance = distances_from(layout.floor, *layout.entry_location)
+    assert distance[layout.exit_location] != np.iinfo(np.int32).max
+
+def test_rooms_layout_needs_a_room():
+    with pytest.raises(ValueError, match="max_rooms"):
+        rooms_layout(np.random.default_rng(0), 80, 43, 0, 6, 10)
+
+def test_largest_region_of_a_floor_without_floor_cells():
+    with pytest.raises(ValueError, match="no floor cells"):
+        largest_region(np.zeros((10, 10), dtype=bool), np.random.default_rng(0))
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+import entity_factories
+import procgen
+
+def old_entities_at_random(weighted_chances, number_of_entities, floor, rng):
+    """The picks made before spawn tables were memoized, with weights="""
+    entity_chances = {}
+    for key, values in weighted_chances.items():
+        if key > floor:
+            break
+        for entity, weighted_chance in values:
+            entity_chances[entity] = weighted_chance
+
+    return rng.choices(list(entity_chances), weights=list(entity_chances.values()), k=number_of_entities)
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    procgen.clear_spawn_tables()
+    yield
+    procgen.clear_spawn_tables()
+
+@pytest.mark.parametrize("chances", [procgen.enemy_chances, procgen.item_chances])
+def test_spawn_tables_pick_like_weights(chances):
+    for floor in range(12):
+        #twice, the second time from the cache
+        for _ in range(2):
+            expected = old_entities_at_random(chances, 50, floor, random.Random(floor))
+            picked = procgen.get_entities_at_random(chances, 50, floor, random.Random(floor))
+            assert picked == expected
+
+def test_spawn_table_cache_drops_least_recently_used():
+    size = procgen.SPAWN_TABLE_CACHE_SIZE
+    chances = procgen.enemy_chances
+
+    first = procgen.get_spawn_table(chances, 0)
+    for floor in range(1, size + 1):
+        #keep floor 0 in use while floor 1 goes stale
+        procgen.get_spawn_table(chances, 0)
+        procgen.get_spawn_table(chances, floor)
+
+    assert len(procgen._spawn_tables) == size
+    assert (id(chances), 0) in procgen._spawn_tables
+    assert (id(chances), 1) not in procgen._spawn_tables
+    assert procgen.get_spawn_table(chances, 0) is first
+
+def test_spawn_table_cache_checks_the_table_behind_an_id():
+    old = {0: [(entity_factories.orc, 1)]}
+    new = {0: [(entity_factories.troll, 1)]}
+    #pretend `new` got the id of a table that was freed
+    procgen._spawn_tables[id(new), 0] = old, procgen.get_spawn_table(old, 0)
+
+    assert procgen.get_spawn_table(new, 0).entities == [entity_factories.troll]
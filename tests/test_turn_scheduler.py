@@ -0,0 +1,104 @@
+from turn_scheduler import ACTION_TIME, NORMAL_SPEED, TurnScheduler, action_time
+
+class FakeActor:
+    def __init__(self, name:str, speed:int = NORMAL_SPEED):
+        self.name = name
+        self.speed = speed
+
+    def __repr__(self) -> str:
+        return self.name
+
+def play(scheduler:TurnScheduler, turns:int, player_speed:int = NORMAL_SPEED) -> list:
+    """Advance one player action at a time, rescheduling actors as the engine does"""
+    acted = []
+    for _ in range(turns):
+        for actor in scheduler.advance(action_time(player_speed)):
+            acted.append(actor)
+            scheduler.add(actor)
+    return acted
+
+def test_action_time_scales_with_speed():
+    assert action_time(NORMAL_SPEED) == ACTION_TIME
+    assert action_time(2 * NORMAL_SPEED) == ACTION_TIME // 2
+    assert action_time(NORMAL_SPEED // 2) == 2 * ACTION_TIME
+    #never zero, and a stopped actor doesn't divide by zero
+    assert action_time(10 ** 9) == 1
+    assert action_time(0) == ACTION_TIME * NORMAL_SPEED
+
+def test_actors_act_in_order_of_speed():
+    scheduler = TurnScheduler()
+    slow, normal, fast = FakeActor("slow", 50), FakeActor("normal"), FakeActor("fast", 200)
+    for actor in (slow, normal, fast):
+        scheduler.add(actor)
+
+    #ties go to whoever was scheduled first
+    acted = play(scheduler, 2)
+    assert acted == [fast, normal, fast, fast, slow, normal, fast]
+    assert scheduler.time == 2 * ACTION_TIME
+
+def test_actors_with_the_same_time_act_in_scheduling_order():
+    scheduler = TurnScheduler()
+    actors = [FakeActor(str(i)) for i in range(5)]
+    for actor in actors:
+        scheduler.add(actor)
+
+    assert play(scheduler, 1) == actors
+
+def test_fast_actors_act_several_times_per_player_turn():
+    scheduler = TurnScheduler()
+    fast = FakeActor("fast", 300)
+    scheduler.add(fast)
+
+    assert play(scheduler, 1) == [fast] * 3
+    #a slow player gives everyone else more turns
+    assert play(scheduler, 1, player_speed=50) == [fast] * 6
+
+def test_adding_twice_keeps_one_entry():
+    scheduler = TurnScheduler()
+    actor = FakeActor("a")
+    scheduler.add(actor)
+    scheduler.add(actor, delay=1)
+
+    assert len(scheduler) == 1
+    assert play(scheduler, 1) == [actor]
+
+def test_removed_actors_are_skipped():
+    scheduler = TurnScheduler()
+    a, b = FakeActor("a"), FakeActor("b")
+    scheduler.add(a)
+    scheduler.add(b)
+    scheduler.remove(a)
+
+    assert a not in scheduler and len(scheduler) == 1
+    assert play(scheduler, 1) == [b]
+    #removing an actor that isn't scheduled does nothing
+    scheduler.remove(a)
+
+def test_removing_during_advance():
+    scheduler = TurnScheduler()
+    killer, victim, other = FakeActor("killer", 200), FakeActor("victim"), FakeActor("other")
+    for actor in (killer, victim, other):
+        scheduler.add(actor)
+
+    acted = []
+    for actor in scheduler.advance(ACTION_TIME):
+        acted.append(actor)
+        if actor is killer:
+            scheduler.remove(victim)
+        scheduler.add(actor)
+
+    assert acted == [killer, other, killer]
+    assert set(scheduler) == {killer, other}
+
+    #the removed actor can be scheduled again, its old entry stays dead
+    scheduler.add(victim)
+    assert play(scheduler, 1) == [killer, other, victim, killer]
+
+def test_clock_reads_the_time_of_the_actor_being_yielded():
+    scheduler = TurnScheduler()
+    scheduler.add(FakeActor("a"), delay=30)
+    scheduler.add(FakeActor("b"), delay=70)
+
+    times = [scheduler.time for _ in scheduler.advance(ACTION_TIME)]
+    assert times == [30, 70]
+    assert scheduler.time == ACTION_TIME
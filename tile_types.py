@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import List, Tuple
 
 import numpy as np #type:ignore
 
@@ -19,15 +19,70 @@ tile_dt = np.dtype(
     ]
 )
 
+#maps store tile indices into the registry, so a map cell takes a single byte
+tile_index_dt = np.uint8
+
+#every tile type ever defined, in definition order.
+#Saved maps refer to tiles by their position here, so only ever append to it.
+_registry:List[np.ndarray] = []
+_tile_table = np.empty(0, dtype=tile_dt)
+_graphics_table = np.empty((3, 0), dtype=graphic_dt)
+
 def new_tile(
         *,
         walkable:int,
         transparent:int,
         dark:Tuple[int, Tuple[int,int,int], Tuple[int,int,int]],
         light:Tuple[int, Tuple[int,int,int], Tuple[int,int,int]],
-) -> np.ndarray:
-    """Helper function for defining individual tile types"""
-    return np.array((walkable, transparent, dark, light), dtype=tile_dt)
+) -> int:
+    """Helper function for defining individual tile types
+
+    Returns the index of the new tile type in the registry.
+    """
+    global _tile_table, _graphics_table
+
+    assert len(_registry) <= np.iinfo(tile_index_dt).max, "Too many tile types."
+
+    _registry.append(np.array((walkable, transparent, dark, light), dtype=tile_dt))
+
+    _tile_table = np.array(_registry, dtype=tile_dt)
+    _graphics_table = np.stack(
+        [np.full(len(_registry), SHROUD), _tile_table["dark"], _tile_table["light"]]
+    )
+
+    return len(_registry) - 1
+
+def tile_indices(tiles:np.ndarray) -> np.ndarray:
+    """Convert an array of tile_dt records, as maps stored them before the registry, to indices.
+
+    Tile types missing from the registry are added to it.
+    """
+    records = np.asarray(tiles, dtype=tile_dt)
+    raw = records.ravel(order="F").view(f"V{tile_dt.itemsize}")
+
+    unique, inverse = np.unique(raw, return_inverse=True)
+    known = {record.tobytes(): i for i, record in enumerate(_tile_table.view(raw.dtype))}
+
+    indices = np.empty(len(unique), dtype=tile_index_dt)
+    for i, value in enumerate(unique):
+        index = known.get(value.tobytes())
+        if index is None:
+            record = value.view(tile_dt).item()
+            index = new_tile(**dict(zip(tile_dt.names, record)))
+        indices[i] = index
+
+    return np.asfortranarray(indices[inverse.ravel()].reshape(records.shape, order="F"))
+
+def tile_table() -> np.ndarray:
+    """Return the records of all registered tile types, indexed by tile index"""
+    return _tile_table
+
+def graphics_table() -> np.ndarray:
+    """Return a (3, tiles) lookup table of graphics.
+
+    The first index is 0 for unexplored, 1 for explored but not visible and 2 for visible.
+    """
+    return _graphics_table
 
 #represents unexplored, unseen tiles
 SHROUD = np.array((ord(" "), (255, 255, 255), (0,0,0)), dtype=graphic_dt)
@@ -51,4 +106,11 @@ down_stairs = new_tile(
     transparent=True,
     dark=(ord(">"), (0,0,100), (50,50,150)),
     light=(ord(">"), (255,255,255), (200,180,50)),
-)
\ No newline at end of file
+)
+
+up_stairs = new_tile(
+    walkable=True,
+    transparent=True,
+    dark=(ord("<"), (0,0,100), (50,50,150)),
+    light=(ord("<"), (255,255,255), (200,180,50)),
+)
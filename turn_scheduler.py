@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterator, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+#time one action takes for an actor moving at NORMAL_SPEED
+ACTION_TIME = 100
+NORMAL_SPEED = 100
+
+def action_time(speed:int) -> int:
+    """Return how long a single action takes for an actor with the given speed"""
+    return max(1, ACTION_TIME * NORMAL_SPEED // max(1, speed))
+
+class TurnScheduler:
+    """Priority queue of actors keyed by the time of their next action.
+
+    The player is not scheduled here, its actions drive the clock through `advance`.
+    Removed actors are only marked as such and skipped when they reach the top of the heap.
+    """
+    def __init__(self):
+        self.time = 0
+        self._heap:List[list] = []
+        self._entries:Dict[Actor, list] = {}
+        #tie breaker so actors scheduled for the same time act in scheduling order
+        self._sequence = 0
+
+    def __contains__(self, actor:Actor) -> bool:
+        return actor in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Actor]:
+        """Iterate over the scheduled actors in no particular order"""
+        return iter(self._entries)
+
+    def add(self, actor:Actor, delay:Optional[int] = None) -> None:
+        """Schedule an actor to act after `delay`, by default one action of its speed"""
+        if actor in self._entries:
+            return
+
+        if delay is None:
+            delay = action_time(actor.speed)
+
+        self._sequence += 1
+        entry = [self.time + delay, self._sequence, actor]
+        self._entries[actor] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, actor:Actor) -> None:
+        entry = self._entries.pop(actor, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def advance(self, amount:int) -> Iterator[Actor]:
+        """Move the clock forward by `amount`, yielding actors as their turn comes up.
+
+        While an actor is being yielded the clock reads its scheduled time, so rescheduling it
+        with `add` after it acted lets fast actors act several times in one advance.
+        Removed actors are never yielded.
+        """
+        end = self.time + amount
+
+        while self._heap and self._heap[0][0] <= end:
+            time, _, actor = heapq.heappop(self._heap)
+            if actor is None:
+                continue
+
+            del self._entries[actor]
+            self.time = time
+            yield actor
+
+        self.time = end